@@ -0,0 +1,405 @@
+import time
+import queue
+import functools
+import threading
+import soxr
+import numpy as np
+import sounddevice as sd
+
+
+class RingBuffer:
+    """Fixed size mono float32 buffer addressed by absolute sample index."""
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self.data = np.zeros(self.capacity, dtype=np.float32)
+        self.written = 0
+        self.lock = threading.Lock()
+
+    def write(self, samples):
+        n = len(samples)
+        with self.lock:
+            if n >= self.capacity:
+                self.data[:] = samples[-self.capacity:]
+                self.written += n
+                return self.written
+            start = self.written % self.capacity
+            first = min(n, self.capacity - start)
+            self.data[start:start + first] = samples[:first]
+            self.data[:n - first] = samples[first:]
+            self.written += n
+            return self.written
+
+    def read(self, start, end):
+        with self.lock:
+            start = max(start, self.written - self.capacity, 0)
+            end = min(end, self.written)
+            if end <= start:
+                return np.zeros(0, dtype=np.float32)
+            idx = np.arange(start, end) % self.capacity
+            return self.data[idx]
+
+
+class Listener:
+    """
+    Continuous microphone capture with energy based endpointing.
+
+    Audio from an ``sd.InputStream`` is written into a ring buffer, and each
+    block's RMS is compared against an adaptive noise floor.  Only complete
+    utterances (speech followed by ``silence_duration`` of quiet) are returned
+    from ``next_utterance``.
+    """
+
+    def __init__(
+        self,
+        samplerate,
+        device=None,
+        block_duration=0.03,
+        threshold=0.01,
+        noise_ratio=3.0,
+        silence_duration=0.6,
+        min_speech_duration=0.25,
+        max_utterance_duration=15.0,
+        pre_roll=0.3,
+        poll_interval=0.1,
+    ):
+        self.samplerate = int(samplerate)
+        self.device = device
+        self.blocksize = int(block_duration * self.samplerate)
+        self.threshold = threshold
+        self.noise_ratio = noise_ratio
+        self.silence_samples = int(silence_duration * self.samplerate)
+        self.min_speech_samples = int(min_speech_duration * self.samplerate)
+        self.max_utterance_samples = int(max_utterance_duration * self.samplerate)
+        self.pre_roll_samples = int(pre_roll * self.samplerate)
+        self.poll_interval = poll_interval
+        self.ring = RingBuffer(
+            self.max_utterance_samples + self.pre_roll_samples + self.silence_samples + self.samplerate
+        )
+        self.blocks = queue.Queue(maxsize=1024)
+        self.noise_floor = threshold / noise_ratio
+        self.muted = False
+        self.gain = 1.0
+        self.stream = None
+        self.closed = threading.Event()
+        self._reset_state()
+
+    def _reset_state(self):
+        self.speech_start = None
+        self.last_voiced = None
+        self.voiced_samples = 0
+
+    def start(self):
+        if self.stream or self.closed.is_set():
+            return
+        self.stream = sd.InputStream(
+            samplerate=self.samplerate,
+            channels=1,
+            dtype="float32",
+            blocksize=self.blocksize,
+            device=self.device,
+            callback=self._callback,
+        )
+        self.stream.start()
+
+    def stop(self):
+        if self.stream:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+
+    def close(self):
+        """Stop capturing for good, releasing any thread blocked in ``next_utterance``."""
+        self.closed.set()
+        self.stop()
+
+    def mute(self):
+        self.muted = True
+
+    def duck(self, gain=4.0):
+        """Keep listening but require louder speech, eg while our own voice is playing."""
+        self.gain = gain
+
+    def unduck(self):
+        self.gain = 1.0
+
+    def unmute(self):
+        self.clear()
+        self.muted = False
+
+    def clear(self):
+        while True:
+            try:
+                self.blocks.get_nowait()
+            except queue.Empty:
+                break
+
+    def _callback(self, indata, frames, time, status):
+        if self.muted:
+            return
+        samples = indata[:, 0]
+        end = self.ring.write(samples)
+        rms = float(np.sqrt(np.mean(np.square(samples))))
+        try:
+            self.blocks.put_nowait((end, len(samples), rms))
+        except queue.Full:
+            pass
+
+    def is_voiced(self, rms):
+        return rms > max(self.threshold, self.noise_floor * self.noise_ratio) * self.gain
+
+    def next_utterance(self, timeout=None):
+        """
+        Block until a complete utterance is captured, returning a float32
+        array, or None after ``timeout`` seconds or once the listener is closed.
+        """
+        self.start()
+        self._reset_state()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        # wait in short slices so a close() from another thread is noticed promptly
+        while not self.closed.is_set():
+            wait = self.poll_interval
+            if deadline is not None:
+                wait = min(wait, deadline - time.monotonic())
+                if wait <= 0:
+                    return None
+            try:
+                end, n, rms = self.blocks.get(timeout=wait)
+            except queue.Empty:
+                continue
+
+            if self.is_voiced(rms):
+                if self.speech_start is None:
+                    self.speech_start = end - n
+                self.last_voiced = end
+                self.voiced_samples += n
+            elif self.speech_start is None:
+                if self.gain != 1.0:
+                    continue
+                self.noise_floor = 0.95 * self.noise_floor + 0.05 * rms
+                continue
+
+            if self.speech_start is None:
+                continue
+
+            ended = end - self.last_voiced >= self.silence_samples
+            too_long = end - self.speech_start >= self.max_utterance_samples
+            if not (ended or too_long):
+                continue
+
+            start, voiced = self.speech_start, self.voiced_samples
+            self._reset_state()
+            if voiced < self.min_speech_samples:
+                continue
+            return self.ring.read(start - self.pre_roll_samples, end)
+        return None
+
+
+class Cue:
+    """
+    A marker between chunks of audio, fired from the output callback as
+    playback reaches it.  Callbacks get ``True`` then, or ``False`` if the
+    audio around it was flushed first, and run on the audio thread so they
+    must hand any real work off.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.state = None
+        self.callbacks = []
+
+    def then(self, callback):
+        with self.lock:
+            if self.state is None:
+                self.callbacks.append(callback)
+                return
+        callback(self.state)
+
+    def fire(self):
+        self._settle(True)
+
+    def cancel(self):
+        self._settle(False)
+
+    def _settle(self, state):
+        with self.lock:
+            if self.state is not None:
+                return
+            self.state = state
+            callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback(state)
+
+
+class Player:
+    """
+    Persistent ``sd.OutputStream`` fed from a queue of float32 chunks, so
+    playback starts as soon as the first chunk of a clip is available.
+    Cues queued between chunks fire as playback reaches them.
+    """
+
+    def __init__(self, samplerate, device=None, blocksize=0):
+        self.samplerate = int(samplerate)
+        self.device = device
+        self.blocksize = blocksize
+        self.chunks = queue.Queue()
+        self.current = None
+        self.offset = 0
+        self.stream = None
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.closed = False
+
+    def start(self):
+        if self.stream or self.closed:
+            return
+        self.stream = sd.OutputStream(
+            samplerate=self.samplerate,
+            channels=1,
+            dtype="float32",
+            blocksize=self.blocksize,
+            device=self.device,
+            latency="low",
+            callback=self._callback,
+        )
+        self.stream.start()
+
+    def stop(self):
+        if self.stream:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+
+    def close(self):
+        """Stop playback for good, releasing any thread blocked in ``play``."""
+        self.closed = True
+        self.flush()
+        self.stop()
+
+    def flush(self):
+        """Drop everything queued or playing, releasing any waiting ``play`` calls."""
+        with self.lock:
+            self.generation += 1
+            self.current = None
+            while True:
+                try:
+                    item = self.chunks.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(item, threading.Event):
+                    item.set()
+                elif isinstance(item, Cue):
+                    item.cancel()
+
+    def _callback(self, outdata, frames, time, status):
+        with self.lock:
+            self._fill(outdata, frames)
+
+    def _fill(self, outdata, frames):
+        filled = 0
+        while filled < frames:
+            if self.current is None:
+                try:
+                    item = self.chunks.get_nowait()
+                except queue.Empty:
+                    break
+                # events mark the end of a clip
+                if isinstance(item, threading.Event):
+                    item.set()
+                    continue
+                # fires as its audio goes to the device, about stream.latency ahead of
+                # the speaker, which is close to what a robot command takes to land
+                if isinstance(item, Cue):
+                    item.fire()
+                    continue
+                self.current, self.offset = item, 0
+
+            n = min(frames - filled, len(self.current) - self.offset)
+            outdata[filled:filled + n, 0] = self.current[self.offset:self.offset + n]
+            filled += n
+            self.offset += n
+            if self.offset >= len(self.current):
+                self.current = None
+        outdata[filled:] = 0
+
+    def _enqueue(self, generation, item):
+        # a flush since play started means this clip was interrupted
+        with self.lock:
+            if generation != self.generation:
+                return False
+            self.chunks.put(item)
+            return True
+
+    def play(self, chunks):
+        """Queue every chunk (or Cue) from the iterable and block until they've played."""
+        self.start()
+        stream = self.stream
+        if stream is None:
+            return
+        done = threading.Event()
+        generation = self.generation
+        for chunk in chunks:
+            if isinstance(chunk, Cue):
+                if not self._enqueue(generation, chunk):
+                    chunk.cancel()
+                    return
+                continue
+            if len(chunk) and not self._enqueue(generation, np.asarray(chunk, dtype=np.float32).reshape(-1)):
+                return
+        if not self._enqueue(generation, done):
+            return
+        done.wait()
+        # the last block is still in the device buffer
+        threading.Event().wait(stream.latency)
+
+
+
+RESAMPLE_QUALITY = {
+    "fast": "LQ",
+    "medium": "MQ",
+    "high": "HQ",
+}
+
+
+class Resampler:
+    """
+    Streaming resampler between two fixed rates, backed by soxr's polyphase
+    engine.  Filter state carries across ``process`` calls, so chunks can be
+    resampled as they arrive without edge artifacts.
+    """
+
+    def __init__(self, src_rate, dst_rate, quality="medium"):
+        self.src_rate = int(src_rate)
+        self.dst_rate = int(dst_rate)
+        self.stream = soxr.ResampleStream(
+            self.src_rate, self.dst_rate, 1, dtype="float32", quality=RESAMPLE_QUALITY[quality]
+        )
+
+    def process(self, chunk, last=False):
+        chunk = np.asarray(chunk, dtype=np.float32).reshape(-1)
+        if self.src_rate == self.dst_rate:
+            return chunk
+        return self.stream.resample_chunk(chunk, last=last)
+
+    def flush(self):
+        """Push the filter tail out, returning the remaining samples."""
+        return self.process(np.zeros(0, dtype=np.float32), last=True)
+
+    def reset(self):
+        self.stream.clear()
+
+
+@functools.lru_cache(maxsize=32)
+def _cached_resampler(src_rate, dst_rate, quality):
+    return Resampler(src_rate, dst_rate, quality), threading.Lock()
+
+
+def resample(audio, src_rate, dst_rate, quality="medium"):
+    """One-shot resample reusing a resampler (and its filters) per rate pair."""
+    audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+    if src_rate == dst_rate:
+        return audio
+    resampler, lock = _cached_resampler(int(src_rate), int(dst_rate), quality)
+    with lock:
+        resampler.reset()
+        return resampler.process(audio, last=True)
@@ -0,0 +1,145 @@
+import json
+import time
+import click
+import asyncio
+import resource
+import tracemalloc
+import numpy as np
+import soundfile as sf
+
+import plural
+from doggo import Doggo
+from fakes import FakeSTT, FakeTTS, FakePlayer, FakeOpenAI, FakeRobot, fake_plural_client
+from stt import WhisperSTT
+from tracing import tracer, configure as configure_tracing
+
+# each turn is what the user says, optionally as a recording, and what the model answers with
+DEFAULT_SCRIPT = [
+    {"text": "k9s, say hello", "reply": "Hello there, humans!", "tools": [["hello", "{}"]]},
+    {"text": "what's a pod?", "reply": "A pod is the smallest deployable unit in Kubernetes. It wraps one or more containers that share networking and storage. Think of it as a little dog house for containers!"},
+    {"text": "dance for us", "reply": "Time to boogie.", "tools": [["dance", "{}"]]},
+    {"text": "scale the staging database to three replicas", "reply": "On it, asking Plural now.", "tools": [["ask_plural", "{\"prompt\": \"scale the staging database to three replicas\"}"]]},
+    {"text": "walk forward a bit then stop", "tools": [["move", "{\"x\": 0.3, \"y\": 0, \"z\": 0}"], ["stop", "{}"]]},
+    {"text": "k9s, say hello", "reply": "Hello there, humans!", "tools": [["hello", "{}"]]},
+    {"text": "k9s, what is a pod", "reply": "A pod is the smallest deployable unit in Kubernetes. It wraps one or more containers that share networking and storage. Think of it as a little dog house for containers!"},
+]
+
+
+def scripted_responder(script):
+    by_text = {turn["text"]: turn for turn in script}
+
+    def respond(messages):
+        # after tools have run, finish the turn without another call
+        if messages[-1]["role"] == "tool":
+            return None, []
+        turn = by_text.get(messages[-1]["content"], {})
+        return turn.get("reply"), turn.get("tools", [])
+
+    return respond
+
+
+def load_audio(turn, samplerate=16000):
+    if turn.get("wav"):
+        audio, rate = sf.read(turn["wav"], dtype="float32", always_2d=True)
+        return audio[:, 0], rate
+    seconds = turn.get("seconds", 1.5)
+    return np.random.default_rng(0).normal(0, 0.01, int(seconds * samplerate)).astype(np.float32), samplerate
+
+
+async def run(script, repeat, stt, options):
+    plural.PAT = plural.PAT or "bench"
+    tts = FakeTTS(first_chunk_latency=options["tts_latency"])
+    dog = Doggo(
+        alive=True,
+        stt=stt,
+        tts=tts,
+        tts_cache_mb=options["tts_cache_mb"],
+        response_cache_mb=options["response_cache_mb"],
+        stream_completions=options["stream_completions"],
+        http=fake_plural_client(options["plural_latency"]),
+        openai_client=FakeOpenAI(scripted_responder(script), first_token_latency=options["llm_latency"]),
+        robots=[{"name": f"dog{i + 1}", "ip": f"10.0.0.{i + 1}"} for i in range(options["robots"])],
+        robot_factory=lambda ip: FakeRobot(latency=options["robot_latency"], connect_latency=0),
+        player=FakePlayer(tts.samplerate, speed=options["playback_speed"]),
+    )
+    startup = await dog.start()
+
+    tracemalloc.start()
+    start = time.monotonic()
+    turns = 0
+    try:
+        for _ in range(repeat):
+            for turn in script:
+                audio, samplerate = load_audio(turn)
+                if isinstance(stt, FakeSTT):
+                    stt.expect(turn["text"])
+
+                turn_id = tracer.new_turn()
+                text = await dog.transcribe(audio, samplerate)
+                await dog.think(text)
+                tracer.end_turn(turn_id)
+                turns += 1
+        # let detached robot commands drain before reporting
+        await asyncio.sleep(0.2)
+    finally:
+        elapsed = time.monotonic() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        await dog.close()
+
+    return {
+        "turns": turns,
+        "startup": {name: round(seconds, 3) for name, seconds in startup.items()},
+        "seconds": round(elapsed, 3),
+        "turns_per_second": round(turns / elapsed, 3) if elapsed else 0.0,
+        "llm_calls": dog.openai.chat.completions.calls,
+        "robot_commands": sum(len(unit.robot.published) for unit in dog.fleet),
+        "plural_requests": dict(dog.http.requests),
+        "memory": {
+            "traced_peak_mb": round(peak / 1024 / 1024, 2),
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2),
+        },
+        "tts_cache": dog.tts_cache.stats() if dog.tts_cache else None,
+        "response_cache": dog.responses.stats() if dog.responses else None,
+        "stages": tracer.summary(),
+    }
+
+
+@click.command()
+@click.option("--script", type=click.Path(exists=True), default=None, help="JSON list of turns, see DEFAULT_SCRIPT")
+@click.option("--repeat", type=int, default=3)
+@click.option("--stt", type=click.Choice(["fake", "whisper"]), default="fake", help="use scripted transcripts or run whisper on the recordings")
+@click.option("--whisper-model", type=str, default="base.en")
+@click.option("--stt-latency", type=float, default=0.3)
+@click.option("--llm-latency", type=float, default=0.4, help="time to first token")
+@click.option("--tts-latency", type=float, default=0.25, help="time to first audio chunk")
+@click.option("--plural-latency", type=float, default=0.5)
+@click.option("--robot-latency", type=float, default=0.03)
+@click.option("--robots", type=int, default=1, help="drive this many fake robots as a fleet")
+@click.option("--playback-speed", type=float, default=10.0, help="play fake audio this many times faster than real time")
+@click.option("--tts-cache-mb", type=int, default=64)
+@click.option("--response-cache-mb", type=int, default=32)
+@click.option("--stream-completions/--no-stream-completions", is_flag=True, default=True)
+@click.option("--trace-file", type=str, default=None)
+@click.option("--output", type=click.Path(), default=None, help="write the report here instead of stdout")
+def main(script, repeat, stt, whisper_model, stt_latency, output, trace_file, **options):
+    configure_tracing(trace_file)
+    turns = DEFAULT_SCRIPT
+    if script:
+        with open(script, "r") as f:
+            turns = json.load(f)
+
+    backend = WhisperSTT(whisper_model) if stt == "whisper" else FakeSTT(stt_latency)
+    report = asyncio.run(run(turns, repeat, backend, options))
+    report["options"] = dict(options, stt=stt, stt_latency=stt_latency, repeat=repeat)
+
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
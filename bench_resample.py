@@ -0,0 +1,58 @@
+import json
+import time
+import click
+import librosa
+import numpy as np
+
+from audio import Resampler, resample, RESAMPLE_QUALITY
+
+
+def timed(fn, repeat):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+@click.command()
+@click.option("--src", type=int, default=22050, help="source sample rate, eg what TTS returns")
+@click.option("--dst", type=int, default=48000, help="target sample rate, eg what the speaker takes")
+@click.option("--seconds", type=float, default=5.0, help="length of the test clip")
+@click.option("--chunk-ms", type=int, default=100, help="chunk size for streaming runs")
+@click.option("--repeat", type=int, default=10)
+def main(src, dst, seconds, chunk_ms, repeat):
+    """Compare the Resampler against the librosa.resample path it replaced."""
+    clip = np.random.default_rng(0).normal(0, 0.1, int(src * seconds)).astype(np.float32)
+    step = int(src * chunk_ms / 1000)
+    chunks = [clip[i:i + step] for i in range(0, len(clip), step)]
+
+    def stream(quality):
+        resampler = Resampler(src, dst, quality)
+        for chunk in chunks:
+            resampler.process(chunk)
+        resampler.flush()
+
+    results = {
+        "librosa.clip": timed(lambda: librosa.resample(clip, orig_sr=src, target_sr=dst), repeat),
+        "librosa.chunks": timed(lambda: [librosa.resample(c, orig_sr=src, target_sr=dst) for c in chunks], repeat),
+    }
+    for quality in RESAMPLE_QUALITY:
+        results[f"{quality}.clip"] = timed(lambda: resample(clip, src, dst, quality), repeat)
+        results[f"{quality}.chunks"] = timed(lambda: stream(quality), repeat)
+
+    print(json.dumps(
+        {
+            "src": src,
+            "dst": dst,
+            "seconds": seconds,
+            "chunk_ms": chunk_ms,
+            # milliseconds of cpu per second of audio
+            "ms_per_audio_second": {k: round(v * 1000 / seconds, 3) for k, v in results.items()},
+        },
+        indent=2,
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+import os
+import re
+import time
+import zlib
+import hashlib
+import tempfile
+import threading
+import numpy as np
+
+from collections import OrderedDict
+from intents import normalize
+
+
+class PhraseCache:
+    """
+    LRU cache of decoded PCM clips, bounded by total bytes held in memory.
+
+    If ``directory`` is set clips are also written there as ``.npy`` files so
+    they survive restarts; disk hits are promoted back into memory.  The
+    directory is bounded by ``max_disk_bytes``, evicting the least recently
+    used files by mtime.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, directory=None, max_disk_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.disk_size = 0
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            self.disk_size = sum(size for _, _, size in self._disk_files())
+
+    @staticmethod
+    def digest(key):
+        return hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{self.digest(key)}.npy")
+
+    def get(self, key):
+        with self.lock:
+            data = self.entries.get(key)
+            if data is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return data
+
+        if self.directory:
+            path = self._path(key)
+            if os.path.exists(path):
+                try:
+                    data = np.load(path)
+                except (OSError, ValueError):
+                    data = None
+                if data is not None:
+                    self._touch(path)
+                    self._insert(key, data)
+                    with self.lock:
+                        self.disk_hits += 1
+                    return data
+
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, data):
+        data = np.ascontiguousarray(data, dtype=np.float32)
+        self._insert(key, data)
+        if self.directory:
+            self._persist(key, data)
+
+    def _persist(self, key, data):
+        if data.nbytes > self.max_disk_bytes:
+            return
+        path = self._path(key)
+        # a unique temp file, concurrent synthesis can miss and persist the same phrase twice
+        fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, data)
+        size = os.path.getsize(tmp)
+        with self.lock:
+            if os.path.exists(path):
+                self.disk_size -= os.path.getsize(path)
+            os.replace(tmp, path)
+            self.disk_size += size
+            if self.disk_size > self.max_disk_bytes:
+                self._evict_disk()
+
+    def _disk_files(self):
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".npy"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.path, stat.st_size))
+        return files
+
+    def _evict_disk(self):
+        # oldest mtime first, disk hits touch their file so this is least recently used
+        for _, path, size in sorted(self._disk_files()):
+            if self.disk_size <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self.disk_size -= size
+
+    @staticmethod
+    def _touch(path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _insert(self, key, data):
+        if data.nbytes > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= old.nbytes
+            self.entries[key] = data
+            self.size += data.nbytes
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= evicted.nbytes
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "entries": len(self.entries),
+                "bytes": self.size,
+                "disk_bytes": self.disk_size,
+            }
+
+
+RESPONSE_TTL = 5 * 60
+
+# words that make a question depend on what was said before it
+REFERENCES = {"it", "its", "that", "this", "those", "these", "them", "they", "he", "she", "him", "her", "again", "else", "more", "previous", "last"}
+
+# words that make a question about the dog, the user or what's going on right now
+LIVE = {
+    "you", "your", "yours", "yourself", "i", "me", "my", "we", "us", "our",
+    "just", "now", "currently", "current", "still", "today", "asked", "said",
+    "running", "status", "battery", "charge", "doing",
+    "dog", "doggo", "robot", "robots", "posture", "standing", "sitting", "lying", "moving", "walking",
+}
+
+FILLER = {"please", "hey", "hi", "ok", "okay", "so", "um", "uh", "like", "well"}
+
+
+def embed(text, dims=512):
+    """Hashed character trigram vector, a cheap local embedding for near-duplicate matching."""
+    vector = np.zeros(dims, dtype=np.float32)
+    padded = f" {text} "
+    for i in range(len(padded) - 2):
+        vector[zlib.crc32(padded[i:i + 3].encode("utf-8")) % dims] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class CachedResponse:
+    __slots__ = ("question", "reply", "audio", "created", "vector")
+
+    def __init__(self, question, reply, audio, vector=None):
+        self.question = question
+        self.reply = reply
+        self.audio = audio
+        self.created = time.monotonic()
+        self.vector = vector
+
+    @property
+    def nbytes(self):
+        return self.audio.nbytes if self.audio is not None else 0
+
+
+class ResponseCache:
+    """
+    Whole answers to standalone questions, the reply text and its audio,
+    keyed by a scope and the normalized transcript so "k9s, what's a pod?"
+    and "what is a pod" are the same question.  The scope is whatever else
+    the answer depended on, the voice for Doggo.  Questions
+    about the dog, the user or anything live are never cached.  Entries
+    expire after ``ttl`` seconds and the cache is bounded by ``max_bytes``
+    of audio.
+
+    With ``similarity`` above zero a question that misses exactly is also
+    matched against cached ones by cosine similarity of ``embed`` vectors.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, ttl=RESPONSE_TTL, similarity=0.0, ignore=()):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.similarity = similarity
+        self.ignore = FILLER | {word for phrase in ignore for word in normalize(phrase).split()}
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def key(self, text):
+        """The normalized question, or None if it can't be answered without context."""
+        text = re.sub(r"['’]s\b", " is", text.lower())
+        text = re.sub(r"['’]re\b", " are", text)
+        words = [w for w in normalize(text).split() if w not in self.ignore]
+        if len(words) < 2 or REFERENCES.intersection(words) or LIVE.intersection(words):
+            return None
+        return " ".join(words)
+
+    def get(self, scope, text):
+        question = self.key(text)
+        if question is None:
+            return None
+
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get((scope, question))
+            if entry is not None and now - entry.created > self.ttl:
+                self._evict((scope, question))
+                entry = None
+            if entry is not None:
+                self.entries.move_to_end((scope, question))
+                self.hits += 1
+                return entry
+
+            if self.similarity > 0:
+                entry = self._nearest(scope, embed(question), now)
+                if entry is not None:
+                    self.near_hits += 1
+                    return entry
+
+            self.misses += 1
+            return None
+
+    def _nearest(self, scope, vector, now):
+        best, best_score = None, self.similarity
+        for (entry_scope, _), entry in self.entries.items():
+            if entry_scope != scope or now - entry.created > self.ttl:
+                continue
+            score = float(np.dot(vector, entry.vector))
+            if score >= best_score:
+                best, best_score = entry, score
+        return best
+
+    def put(self, scope, text, reply, audio=None):
+        question = self.key(text)
+        if question is None or not reply:
+            return
+        if audio is not None:
+            audio = np.ascontiguousarray(audio, dtype=np.float32)
+        entry = CachedResponse(question, reply, audio, embed(question) if self.similarity > 0 else None)
+        if entry.nbytes > self.max_bytes:
+            return
+
+        with self.lock:
+            self._evict((scope, question))
+            self.entries[(scope, question)] = entry
+            self.size += entry.nbytes
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= evicted.nbytes
+
+    def _evict(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.nbytes
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.near_hits + self.misses
+            return {
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.near_hits) / lookups if lookups else 0.0,
+                "entries": len(self.entries),
+                "bytes": self.size,
+            }
@@ -0,0 +1,59 @@
+import asyncio
+import contextvars
+
+from contextlib import contextmanager
+
+# the cue tool calls in this context are lined up with, see aligned()
+_cue = contextvars.ContextVar("cue", default=None)
+
+
+@contextmanager
+def aligned(cue):
+    """Line up robot commands issued in this block with ``cue``, None runs them straight away."""
+    token = _cue.set(cue)
+    try:
+        yield
+    finally:
+        _cue.reset(token)
+
+
+def at_cue(callback, dropped=None):
+    """
+    Call ``callback`` on the event loop once playback reaches the current
+    cue, or now without one.  It's dropped if the speech it was lined up
+    with gets interrupted, and ``dropped`` is called instead.
+    """
+    cue = _cue.get()
+    if cue is None:
+        callback()
+        return
+
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+
+    def reached(played):
+        if loop.is_closed():
+            return
+        if played:
+            loop.call_soon_threadsafe(callback, context=context)
+        elif dropped:
+            loop.call_soon_threadsafe(dropped, context=context)
+
+    cue.then(reached)
+
+
+async def reached():
+    """Wait for playback to reach the current cue, returning False if it never will."""
+    cue = _cue.get()
+    if cue is None:
+        return True
+
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def settle(played):
+        if not future.done():
+            future.set_result(played)
+
+    cue.then(lambda played: loop.call_soon_threadsafe(settle, played))
+    return await future
@@ -1,30 +1,40 @@
-import openai
 import asyncio
+import contextvars
 import sounddevice as sd
-import soundfile as sf
-import elevenlabs
-import whisper
-import tempfile
 import os
 import json
+import time
 import click
-import librosa
-from unitree_webrtc_connect.webrtc_driver import (
-    UnitreeWebRTCConnection,
-    WebRTCConnectionMethod,
-)
-from unitree_webrtc_connect.constants import RTC_TOPIC, SPORT_CMD
-from plural import AskPlural
-
-from io import BytesIO
+import httpx
+import numpy as np
+from unitree_webrtc_connect.constants import SPORT_CMD
+from plural import AskPlural, SessionTracker, PLURAL_GQL_ENDPOINT
+from registry import Tool, ToolRegistry, ToolArgumentError, load_spec
+from audio import Listener, Player, Cue, RESAMPLE_QUALITY
+from choreography import aligned, at_cue, reached
+from tts import ElevenLabsTTS, CachedTTS, SentenceSplitter, SpeechStream
+from cache import PhraseCache, ResponseCache, RESPONSE_TTL
+from pipeline import Pipeline
+from robot import ConnectionSupervisor
+from fleet import Fleet, Unit, load_fleet
+from intents import WakeGate, IntentMatcher, WAKE_WORDS
+from memory import Conversation, MAX_TOKENS as MEMORY_TOKENS
+from tracing import tracer, bind, configure as configure_tracing
+from stt import stt_backend, BACKENDS as STT_BACKENDS
 
 ROBOT_IP = "192.168.50.191"
 
 OPENAI_MODEL = "gpt-4.1-mini"
 
-RECORDING_DURATION = 2
+HTTP_TIMEOUT = 30.0
+HTTP_CONNECT_TIMEOUT = 5.0
+HTTP_KEEPALIVE_EXPIRY = 120.0
+
 # sd.default.samplerate = 16000
 
+# audio played in this context is also appended here, see Doggo.think
+_recording = contextvars.ContextVar("recording", default=None)
+
 VOICES = {
     "burt": "4YYIPFl9wE5c4L2eu2Gb",
     "drill_seargent": "DGzg6RaUqxGRTHSBjfgF",
@@ -34,22 +44,25 @@ VOICES = {
     "scottish": "y6p0SvBlfEe2MH4XN7BP"
 }
 
-class Tool:
-    def __init__(self, name, description, filepath, callback, awake=True):
-        self.name = name
-        self.description = description
-        self.filepath = filepath
-        self.callback = callback
-        self.awake = awake
-        self.spec = None
+TRICKS = []
 
-        with open(self.filepath, "r") as f:
-            self.spec = json.load(f)
 
-    async def run(self, params):
-        return await self.callback(params)
+def trick(cls):
+    """Register a Trick subclass so every Doggo gets it as a tool."""
+    TRICKS.append(cls)
+    return cls
+
 
 class Trick:
+    # scheduling policy for this trick's robot commands, see robot.CommandScheduler
+    coalesce = False
+    urgent = False
+    wait = False
+    # roughly how long the robot is busy with the trick, routines chain on it
+    duration = 0.0
+    # postures, see telemetry.POSTURES, in which the trick would do nothing
+    noop = ()
+
     def __init__(self, dog, name, description, file):
         self.name = name
         self.description = description
@@ -59,30 +72,110 @@ class Trick:
     async def act(self, params):
         pass
 
+    async def run(self, params):
+        fleet = self.dog.fleet
+        if not fleet or len(fleet) == 1:
+            return await self._act(params)
+
+        with fleet.target(params.pop("robot", None)):
+            names = ", ".join(unit.name for unit in fleet.route())
+            result = await self._act(params)
+        return f"{names}: {result}" if result else result
+
+    async def _act(self, params):
+        if self.already():
+            return f"Doggo is already {self.noop[0]}, nothing to do"
+        return await self.act(params)
+
+    def targets(self):
+        """
+        The routed robots this trick would actually change something on.  A
+        robot with commands still to carry out gets the trick regardless,
+        its telemetry doesn't show where those leave it.
+        """
+        return [
+            unit for unit in self.dog.fleet.route()
+            if unit.busy() or not unit.telemetry.is_in(self.noop)
+        ]
+
+    def already(self):
+        return bool(self.noop and self.dog.fleet and not self.targets())
+
     async def call_robot(self, api_id, params=None):
-        args = {'api_id': api_id}
-        if params:
-            args["parameter"] = params
-
-        async def _call():
-            await self.dog.maybe_reconnect()
-            await self.dog.robot.datachannel.pub_sub.publish_request_new(
-                RTC_TOPIC["SPORT_MOD"], args
-            )
+        if not self.dog.fleet:
+            print("No robot connected, skipping command ", api_id)
+            return None
 
-        asyncio.create_task(_call())
+        # held from now, so a later trick this turn doesn't judge by telemetry that's about to change
+        units = self.targets()
+        for unit in units:
+            unit.hold()
+
+        def drop():
+            for unit in units:
+                unit.release()
+
+        if self.wait:
+            if not self.urgent and not await reached():
+                drop()
+                return None
+            results = await asyncio.gather(*self.submit(units, api_id, params))
+            return results[0] if len(results) == 1 else results
+
+        # nobody is waiting on the acks, just make sure failures don't go unnoticed
+        def send():
+            for ack in self.submit(units, api_id, params):
+                ack.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+        # start moving as the reply starts playing, except for anything urgent
+        if self.urgent:
+            send()
+        else:
+            at_cue(send, dropped=drop)
+        return None
+
+    def submit(self, units, api_id, params=None):
+        loop = asyncio.get_running_loop()
+        acks = []
+        for unit in units:
+            ack = unit.commands.submit(api_id, params, coalesce=self.coalesce, urgent=self.urgent)
+            # telemetry lags the ack while the robot carries the command out
+            ack.add_done_callback(lambda _, unit=unit: loop.call_later(self.duration, unit.release))
+            acks.append(ack)
+        return acks
+
+    def lead(self):
+        """How far ahead of time to send a command so it lands when it's due."""
+        if not self.dog.fleet:
+            return 0.0
+        lead = 0.0
+        for unit in self.dog.fleet.route():
+            stats = unit.commands.stats()
+            lead = max(lead, stats.get("queued_p50", 0.0) + stats.get("sent_p50", 0.0))
+        return lead
 
     def tool(self):
+        spec = None
+        fleet = self.dog.fleet
+        if fleet and len(fleet) > 1:
+            spec = dict(load_spec(self.file))
+            spec["properties"] = dict(spec.get("properties", {}), robot=fleet.robot_property())
         return Tool(
             name=self.name,
             description=self.description,
             filepath=self.file,
-            callback=self.act,
+            callback=self.run,
             awake=True,
+            lane="robot",
+            spec=spec,
         )
 
 
+@trick
 class StandUp(Trick):
+    duration = 1.5
+    noop = ("standing",)
+
     def __init__(self, dog):
         super().__init__(dog, "stand_up", "Make the dog stand up", "tools/empty.json")
 
@@ -90,7 +183,11 @@ class StandUp(Trick):
         await self.call_robot(SPORT_CMD["StandUp"])
         return "Doggo is now standing up"
 
+@trick
 class Damp(Trick):
+    duration = 1.5
+    noop = ("lying down",)
+
     def __init__(self, dog):
         super().__init__(dog, "lie_down", "Make the dog lie down", "tools/empty.json")
 
@@ -98,7 +195,10 @@ class Damp(Trick):
         await self.call_robot(SPORT_CMD["Damp"])
         return "Doggo is now damping"
 
+@trick
 class Hello(Trick):
+    duration = 3.0
+
     def __init__(self, dog):
         super().__init__(dog, "hello", "Make the dog say hello", "tools/empty.json")
 
@@ -106,7 +206,10 @@ class Hello(Trick):
         await self.call_robot(SPORT_CMD["Hello"])
         return "Doggo is now saying hello"
 
+@trick
 class Move(Trick):
+    coalesce = True
+
     def __init__(self, dog):
         super().__init__(dog, "move", "Make the dog move", "tools/move.json")
 
@@ -114,15 +217,22 @@ class Move(Trick):
         await self.call_robot(SPORT_CMD["Move"], params)
         return "Doggo is now moving"
 
+@trick
 class Stop(Trick):
+    urgent = True
+
     def __init__(self, dog):
         super().__init__(dog, "stop", "Make the dog stop", "tools/empty.json")
 
     async def act(self, params):
+        self.dog.stop_routine()
         await self.call_robot(SPORT_CMD["Stop"])
         return "Doggo is now stopping"
 
+@trick
 class Dance(Trick):
+    duration = 10.0
+
     def __init__(self, dog):
         super().__init__(dog, "dance", "Make the dog dance", "tools/empty.json")
 
@@ -130,7 +240,10 @@ class Dance(Trick):
         await self.call_robot(SPORT_CMD["Dance1"])
         return "Doggo is now dancing"
 
+@trick
 class Jump(Trick):
+    duration = 2.0
+
     def __init__(self, dog):
         super().__init__(dog, "jump", "Make the dog jump", "tools/empty.json")
 
@@ -138,7 +251,10 @@ class Jump(Trick):
         await self.call_robot(SPORT_CMD["FrontJump"])
         return "Doggo is now jumping"
 
+@trick
 class Stretch(Trick):
+    duration = 4.0
+
     def __init__(self, dog):
         super().__init__(dog, "stretch", "Make the dog stretch", "tools/empty.json")
 
@@ -146,55 +262,143 @@ class Stretch(Trick):
         await self.call_robot(SPORT_CMD["Stretch"])
         return "Doggo is now stretching"
 
+@trick
+class Routine(Trick):
+    def __init__(self, dog):
+        super().__init__(dog, "routine", "Make the dog do several tricks back to back", "tools/routine.json")
+
+    async def act(self, params):
+        tricks = {trick.name: trick for trick in (cls(self.dog) for cls in TRICKS) if trick.duration}
+        unknown = [name for name in params["steps"] if name not in tricks]
+        if unknown:
+            return f"Error: {', '.join(unknown)} can't be part of a routine, use any of {', '.join(tricks)}"
+
+        steps = [tricks[name] for name in params["steps"]]
+        self.dog.stop_routine()
+        self.dog.routine = asyncio.create_task(self.perform(steps))
+        return "Doggo is doing " + ", then ".join(step.name for step in steps)
+
+    async def perform(self, steps):
+        """
+        Run each step as the previous one is due to finish, sending it early
+        by the robot's command latency so there's no idle gap in between.
+        """
+        if not await reached():
+            return
+        with aligned(None):
+            for i, step in enumerate(steps):
+                if step.already():
+                    continue
+                start = time.monotonic()
+                await step.act({})
+                if i < len(steps) - 1:
+                    await asyncio.sleep(max(0.0, step.duration - step.lead() - (time.monotonic() - start)))
+
 
 def trick_tools(dog):
-    tricks = [
-        StandUp(dog),
-        Damp(dog),
-        Hello(dog),
-        Move(dog),
-        Stop(dog),
-        Dance(dog),
-        Jump(dog),
-        Stretch(dog),
-    ]
-    return [trick.tool() for trick in tricks]
+    return [trick(dog).tool() for trick in TRICKS]
 
 class Doggo:
     awake = True
     alive = True
 
-    def __init__(self, voice="michael", alive=True, output_sample_rate=48000, echo=False):
+    def __init__(self, voice="michael", alive=True, output_sample_rate=48000, echo=False, vad_threshold=0.01, silence_duration=0.6, stt="elevenlabs", whisper_model="base.en", tts_cache_mb=64, tts_cache_dir=None, tts_cache_disk_mb=256, stream_completions=True, http_timeout=HTTP_TIMEOUT, http=None, barge_in=False, reconnect_policy="buffer", robots=None, robot_factory=None, tts=None, openai_client=None, player=None, low_bandwidth=False, resample_quality="medium", wake_gate=True, wake_words=None, fast_intents=True, intent_synonyms=None, memory_tokens=MEMORY_TOKENS, plural_poll_interval=5.0, response_cache_mb=32, response_cache_ttl=RESPONSE_TTL, response_cache_similarity=0.0):
+        started = time.monotonic()
         self.voice_id = VOICES[voice]
         self.alive = alive
-        self.robot = None
+        self.fleet = None
+        self.routine = None
+        self.listener = None
         self.echo = echo
         self.output_sample_rate = output_sample_rate
+        self.stream_completions = stream_completions
+        self.barge_in = barge_in
+        self.conversation = Conversation(memory_tokens) if memory_tokens > 0 else None
 
         if self.alive:
-            self.robot = UnitreeWebRTCConnection(
-                WebRTCConnectionMethod.LocalSTA, ip=ROBOT_IP
+            self.listener = Listener(
+                sd.default.samplerate or 16000,
+                threshold=vad_threshold,
+                silence_duration=silence_duration,
             )
 
-        self.elevenlabs = elevenlabs.ElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY"))
-        self.openai = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.tools = [
+        # heavy sdks are only imported for the backends actually in use
+        self.elevenlabs = None
+        if tts is None or stt == "elevenlabs":
+            import elevenlabs
+            self.elevenlabs = elevenlabs.ElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY"))
+        # a named backend is loaded by start(), off the event loop and alongside everything else
+        self.stt = stt
+        self.stt_options = {"whisper_model": whisper_model, "compressed": low_bandwidth}
+        self.tts = tts or ElevenLabsTTS(
+            self.elevenlabs,
+            self.voice_id,
+            output_sample_rate=output_sample_rate,
+            compressed=low_bandwidth,
+            resample_quality=resample_quality,
+        )
+        self.tts_cache = None
+        if tts_cache_mb > 0:
+            self.tts_cache = PhraseCache(tts_cache_mb * 1024 * 1024, tts_cache_dir, tts_cache_disk_mb * 1024 * 1024)
+            self.tts = CachedTTS(self.tts, self.tts_cache)
+        self.player = player
+
+        # every robot shares the clients and caches above, each just gets a connection and a voice
+        if self.alive:
+            robot_factory = robot_factory or robot_connection
+            robots = robots or [{"name": "k9s", "ip": ROBOT_IP}]
+            self.fleet = Fleet([
+                Unit(
+                    config["name"],
+                    robot_factory(config["ip"]),
+                    self.tts.with_voice(VOICES.get(config["voice"], config["voice"])) if config.get("voice") else self.tts,
+                    reconnect_policy=reconnect_policy,
+                )
+                for config in robots
+            ])
+        if self.fleet and len(self.fleet) > 1:
+            # robot names address the pack too, whether asleep or picking a fast path trick
+            wake_words = (wake_words or WAKE_WORDS) + self.fleet.names()
+        self.wake_gate = WakeGate(wake_words) if wake_gate else None
+        self.responses = None
+        if response_cache_mb > 0:
+            self.responses = ResponseCache(
+                response_cache_mb * 1024 * 1024,
+                ttl=response_cache_ttl,
+                similarity=response_cache_similarity,
+                ignore=wake_words or WAKE_WORDS,
+            )
+
+        # one pooled client shared by openai and plural, so requests reuse warm connections
+        self.http = http or http_client(http_timeout)
+        self.openai = openai_client or openai_client_for(self.http, http_timeout)
+        self.tools = ToolRegistry([
             Tool(
                 "awake",
                 "Wake up the doggo",
                 "tools/awake.json",
                 lambda _: self.toggle_sleep(False),
                 awake=False,
+                lane="state",
             ),
             Tool(
                 "sleep",
                 "Put the doggo to sleep",
                 "tools/sleep.json",
-                lambda _: self.toggle_sleep(True)
+                lambda _: self.toggle_sleep(True),
+                lane="state",
             )
-        ]
+        ])
         self.tools.extend(trick_tools(self))
-        self.tools.append(AskPlural().tool(Tool))
+        # finished plural sessions are announced between turns, see Pipeline.announce
+        self.notices = asyncio.Queue()
+        self.sessions = SessionTracker(self.http, poll_interval=plural_poll_interval, on_update=self.notify)
+        self.tools.register(AskPlural(self.http, tracker=self.sessions).tool(Tool))
+
+        self.intents = None
+        if fast_intents:
+            tricks = [tool for tool in self.tools if tool.lane == "robot"]
+            self.intents = IntentMatcher(tricks, synonyms=intent_synonyms, wake_words=wake_words)
 
         self.asleep_prompt, self.awake_prompt = None, None
 
@@ -204,12 +408,88 @@ class Doggo:
         with open("prompts/awake.md", "r") as f:
             self.awake_prompt = f.read()
 
+        if self.fleet and len(self.fleet) > 1:
+            self.awake_prompt += (
+                f"\n\nYou're a pack of {len(self.fleet)} robot dogs: {', '.join(self.fleet.names())}. "
+                "Trick tools take a robot argument, pass a name to command one of them or 'all' for the whole pack, "
+                "or leave it out to command whoever was addressed."
+            )
+
+        self.startup = {"init": time.monotonic() - started}
+
+    async def close(self):
+        self.stop_routine()
+        # release threads blocked on the audio devices, asyncio.run waits for them on exit
+        if self.listener:
+            self.listener.close()
+        if self.player:
+            self.player.close()
+        await self.sessions.stop()
+        if self.fleet:
+            await self.fleet.close()
+        await self.http.aclose()
+
     async def connect_robot(self):
-        if self.robot:
-            await self.robot.connect()
+        if self.fleet:
+            await self.fleet.start()
+
+    async def start(self):
+        """
+        Warm start: connect the robot, open the audio devices, load the
+        speech-to-text backend and open HTTP connections all at once, rather
+        than one after another.  Returns seconds spent per step.
+        """
+        loop = asyncio.get_running_loop()
+
+        async def timed(name, step):
+            start = time.monotonic()
+            try:
+                await step
+            except Exception as e:
+                print("Startup step ", name, " failed: ", e)
+            self.startup[name] = time.monotonic() - start
+            tracer.record(f"startup.{name}", self.startup[name])
+
+        start = time.monotonic()
+        await asyncio.gather(
+            timed("robot", self.connect_robot()),
+            timed("audio", loop.run_in_executor(None, self._open_audio)),
+            timed("stt", loop.run_in_executor(None, self._load_stt)),
+            timed("http", self._warm_http()),
+        )
+        self.startup["total"] = self.startup["init"] + time.monotonic() - start
+        if self.listener:
+            # drop anything heard while we were still starting up
+            self.listener.clear()
+        return self.startup
+
+    def _open_audio(self):
+        if not self.alive:
+            return
+        self.listener.start()
+        if self.player is None:
+            self.player = Player(self.tts.samplerate)
+        self.player.start()
+        print("Audio devices: ", sd.default.device)
+
+    def _load_stt(self):
+        if isinstance(self.stt, str):
+            self.stt = stt_backend(self.stt, elevenlabs_client=self.elevenlabs, **self.stt_options)
+        return self.stt
+
+    async def _warm_http(self):
+        # a cheap request per host gets dns, tcp and tls out of the way before the first turn
+        urls = [PLURAL_GQL_ENDPOINT]
+        base_url = getattr(self.openai, "base_url", None)
+        if base_url:
+            urls.append(str(base_url))
+        results = await asyncio.gather(*[self.http.head(url) for url in urls], return_exceptions=True)
+        for url, result in zip(urls, results):
+            if isinstance(result, Exception):
+                print("Could not reach ", url, ": ", result)
 
     def toggle_sleep(self, sleep):
-        self.awake = sleep
+        self.awake = not sleep
         if sleep:
             return "Doggo is now sleeping"
         return "Doggo is now awake"
@@ -220,169 +500,467 @@ class Doggo:
         return self.asleep_prompt
 
     def valid_tools(self):
-        return [tool for tool in self.tools if tool.awake == self.awake]
+        return self.tools.for_state(self.awake)
+
+    def stop_routine(self):
+        if self.routine and not self.routine.done():
+            self.routine.cancel()
+        self.routine = None
+
+    def voice(self):
+        return self.fleet.voice(self.tts) if self.fleet else self.tts
+
+    def print_summary(self):
+        tracer.print_summary()
+        if self.tts_cache:
+            print("TTS cache: ", self.tts_cache.stats())
 
     async def think(self, text):
-        messages = [
-            {"role": "system", "content": self.system_prompt()},
-            {"role": "user", "content": text},
-        ]
+        if self.fleet:
+            self.fleet.address(text)
 
-        i = 0
-        while await self.run_completion(messages) and self.awake and i < 5:
-            i += 1
+        # while asleep only bother the model if someone plausibly said "k9s"
+        if not self.awake and self.wake_gate and not self.wake_gate.matches(text):
+            print("Asleep and not addressed, ignoring: ", text)
+            return
 
-    async def run_completion(self, messages):
-        tools = self.valid_tools()
-        by_name = {tool.name: tool for tool in tools}
-        response = self.openai.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=messages,
-            tools=[
-                {
-                    "type": "function",
-                    "function": {
-                        "name": tool.name,
-                        "description": tool.description,
-                        "parameters": tool.spec,
-                    },
-                }
-                for tool in tools
-            ],
-        )
-        choice = response.choices[0]
-
-        if choice.message.content:
-            messages.append({"role": "assistant", "content": choice.message.content})
-            await self.speak(choice.message.content)
-
-        if choice.message.tool_calls:
-            call_messages = [
-                {
-                    "type": "function",
-                    "id": tool_call.id,
-                    "function": {
-                        "name": tool_call.function.name,
-                        "arguments": tool_call.function.arguments,
-                    },
-                }
-                for tool_call in choice.message.tool_calls
+        # simple trick commands go straight to the robot
+        if self.awake and self.intents:
+            tool = self.intents.match(text)
+            if tool:
+                print("Fast path: ", tool.name)
+                with tracer.span(f"tool.{tool.name}", fast_path=True):
+                    result = await tool.run("{}")
+                self.remember(text, tool, result)
+                return
+
+        # a standalone question asked before is answered without the model or tts.  the
+        # cache's key() turns away anything that refers back or asks about live state,
+        # so what's left doesn't depend on history or the robot and only the voice matters
+        voice = getattr(self.voice(), "voice_id", None)
+        if self.awake and self.responses:
+            cached = self.responses.get(voice, text)
+            if cached:
+                await self.replay(text, cached)
+                return
+
+        if self.conversation:
+            messages = self.conversation.messages(self.system_prompt(), text)
+        else:
+            messages = [
+                {"role": "system", "content": self.system_prompt()},
+                {"role": "user", "content": text},
             ]
-
+        if self.fleet and self.awake:
+            # kept next to the question rather than in the system prompt, so the prefix stays cacheable
+            messages.insert(-1, {"role": "system", "content": "Robot state: " + self.fleet.summary()})
+        start = len(messages) - 1
+
+        speech = SpeechStream(self.voice(), self._play_sync) if self.stream_completions else None
+        recording = []
+        token = _recording.set(recording)
+        try:
+            i = 0
+            while await self.run_completion(messages, speech) and self.awake and i < 5:
+                i += 1
+            if speech:
+                await speech.close()
+        except asyncio.CancelledError:
+            if speech:
+                speech.cancel()
+            # an interrupted turn may have unanswered tool calls, keep just what was asked
+            if self.conversation:
+                self.conversation.record(messages[start:start + 1])
+            raise
+        except Exception:
+            # a failed completion or tool leaves the speech worker waiting, stop it
+            if speech:
+                speech.cancel()
+            raise
+        finally:
+            _recording.reset(token)
+
+        if self.conversation:
+            self.conversation.record(messages[start:])
+
+        # only plain answers are worth reusing, anything that ran tools did something
+        if self.responses and self.awake and not any(m.get("tool_calls") for m in messages[start:]):
+            reply = " ".join(m["content"] for m in messages[start:] if m["role"] == "assistant" and m.get("content"))
+            audio = np.concatenate(recording) if recording else None
+            self.responses.put(voice, text, reply, audio)
+
+    async def replay(self, text, cached):
+        print("Cached answer: ", cached.reply)
+        with tracer.span("response_cache"):
+            if cached.audio is not None:
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, bind(self._play_sync, [cached.audio]))
+            else:
+                await self.speak(cached.reply)
+        print("Response cache: ", self.responses.stats())
+        if self.conversation:
+            self.conversation.record([
+                {"role": "user", "content": text},
+                {"role": "assistant", "content": cached.reply},
+            ])
+
+    def notify(self, session):
+        self.notices.put_nowait(session.summary())
+
+    async def announce(self, notice):
+        """Tell the user about something that finished in the background, and remember it."""
+        if self.conversation:
+            self.conversation.record([{"role": "system", "content": notice}])
+        await self.speak(notice)
+
+    def remember(self, text, tool, result):
+        """Record a turn handled without the model, so follow-ups like "do it again" work."""
+        if not self.conversation:
+            return
+        call_id = f"local_{time.monotonic_ns()}"
+        self.conversation.record([
+            {"role": "user", "content": text},
+            {
+                "role": "assistant",
+                "tool_calls": [
+                    {"type": "function", "id": call_id, "function": {"name": tool.name, "arguments": "{}"}}
+                ],
+            },
+            {"role": "tool", "content": result or "", "tool_call_id": call_id},
+        ])
+
+    async def run_completion(self, messages, speech=None):
+        tools = self.valid_tools()
+        request = {
+            "model": OPENAI_MODEL,
+            "messages": messages,
+            "tools": tools.payload,
+        }
+
+        spoken = len(speech.cues) if speech else 0
+        with tracer.span("completion", model=OPENAI_MODEL, stream=bool(speech)):
+            if speech:
+                content, call_messages = await self._stream_completion(request, speech)
+            else:
+                content, call_messages = await self._complete(request)
+
+        if content:
+            messages.append({"role": "assistant", "content": content})
+            if not speech:
+                await self.speak(content)
+
+        if call_messages:
             messages.append({"role": "assistant", "tool_calls": call_messages})
-            for tool_call in choice.message.tool_calls:
-                tool = by_name[tool_call.function.name]
-                result = await tool.run(tool_call.function.arguments)
+            # tricks start with the first sentence of this reply rather than after it
+            cue = speech.cues[spoken] if speech and len(speech.cues) > spoken else None
+            with aligned(cue):
+                results = await self.run_tools(call_messages, tools.by_name)
+            for tool_call, result in zip(call_messages, results):
                 messages.append(
-                    {"role": "tool", "content": result, "tool_call_id": tool_call.id}
+                    {"role": "tool", "content": result, "tool_call_id": tool_call["id"]}
                 )
             return True
 
         return False
 
-    async def maybe_reconnect(self):
-        if not self.robot.isConnected:
-            await self.robot.reconnect()
+    async def run_tools(self, call_messages, by_name):
+        """Run a turn's tool calls concurrently, returning results in call order."""
+        lanes = {}
+        tasks = []
+        for tool_call in call_messages:
+            tool = by_name.get(tool_call["function"]["name"])
+            if tool is None:
+                tasks.append(asyncio.create_task(self._unknown_tool(tool_call["function"]["name"], by_name)))
+                continue
+            task = asyncio.create_task(
+                self._run_tool(tool, tool_call["function"]["arguments"], lanes.get(tool.lane))
+            )
+            if tool.lane:
+                lanes[tool.lane] = task
+            tasks.append(task)
+        try:
+            return await asyncio.gather(*tasks)
+        except asyncio.CancelledError:
+            for task in tasks:
+                task.cancel()
+            raise
+
+    async def _unknown_tool(self, name, by_name):
+        print("Model called unknown tool ", name)
+        return json.dumps({"error": "unknown_tool", "tool": name, "available": sorted(by_name)})
+
+    async def _run_tool(self, tool, arguments, after=None):
+        if after:
+            await asyncio.wait([after])
+        try:
+            with tracer.span(f"tool.{tool.name}"):
+                return await tool.run(arguments)
+        except ToolArgumentError as e:
+            print("Rejected ", e)
+            return e.result()
+        except Exception as e:
+            print("Tool ", tool.name, " failed: ", e)
+            return f"Error running {tool.name}: {e}"
+
+    async def _complete(self, request):
+        response = await self.openai.chat.completions.create(**request)
+        message = response.choices[0].message
+        call_messages = [
+            {
+                "type": "function",
+                "id": tool_call.id,
+                "function": {
+                    "name": tool_call.function.name,
+                    "arguments": tool_call.function.arguments,
+                },
+            }
+            for tool_call in message.tool_calls or []
+        ]
+        return message.content, call_messages
+
+    async def _stream_completion(self, request, speech):
+        content, calls = [], {}
+        splitter = SentenceSplitter()
+        start = time.monotonic()
+        stream = await self.openai.chat.completions.create(stream=True, **request)
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            if start:
+                tracer.record("completion.first_token", time.monotonic() - start, tracer.current_turn())
+                start = None
+            delta = chunk.choices[0].delta
+            if delta.content:
+                content.append(delta.content)
+                for sentence in splitter.feed(delta.content):
+                    self._say(speech, sentence)
+
+            # tool calls arrive as fragments keyed by index
+            for fragment in delta.tool_calls or []:
+                call = calls.setdefault(
+                    fragment.index,
+                    {"type": "function", "id": None, "function": {"name": "", "arguments": ""}},
+                )
+                if fragment.id:
+                    call["id"] = fragment.id
+                if fragment.function and fragment.function.name:
+                    call["function"]["name"] += fragment.function.name
+                if fragment.function and fragment.function.arguments:
+                    call["function"]["arguments"] += fragment.function.arguments
+
+        for sentence in splitter.flush():
+            self._say(speech, sentence)
+        return "".join(content), [calls[i] for i in sorted(calls)]
+
+    def _say(self, speech, sentence):
+        if not self.awake:
+            return
+        print("Speaking: ", sentence)
+        speech.say(sentence)
 
     async def listen(self):
+        audio = await self.capture()
+        if audio is None:
+            return None
+        return await self.transcribe(audio)
+
+    async def capture(self):
         if not self.alive:
             return None
 
         loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(None, self._listen_sync)
+        return await loop.run_in_executor(None, bind(self._capture_sync))
 
-    def _listen_sync(self):
+    def _capture_sync(self):
         print("Listening...")
-        audio = sd.rec(int(RECORDING_DURATION * sd.default.samplerate), channels=1, samplerate=sd.default.samplerate)
-        sd.wait()
+        audio = self.listener.next_utterance()
+        if audio is None or len(audio) == 0:
+            return None
 
         if self.echo:
-            sd.play(audio, sd.default.samplerate)
+            self.listener.mute()
+            sd.play(audio, self.listener.samplerate)
             sd.wait()
-        # if sd.default.samplerate != 16000:
-        #     audio = librosa.resample(audio, orig_sr=sd.default.samplerate, target_sr=16000)
-
-        bytes_io = BytesIO()
-        bytes_io.name = "audio.mp3"
-        sf.write(
-            bytes_io,
-            audio,
-            sd.default.samplerate,
-            bitrate_mode="CONSTANT",
-            compression_level=0.99,
-        )
-        bytes_io.seek(0)
-        # Use ElevenLabs speech-to-text instead of local Whisper
-        result = self.elevenlabs.speech_to_text.convert(
-            file=bytes_io,
-            model_id="scribe_v1",
-            language_code="en",  # or whichever model you require
-        )
-        print("Result: ", result.text)
-        return result.text
+            self.listener.unmute()
+        return audio
+
+    async def transcribe(self, audio, samplerate=None):
+        samplerate = samplerate or self.listener.samplerate
+        loop = asyncio.get_running_loop()
+        with tracer.span("transcribe", seconds=round(len(audio) / samplerate, 2)):
+            text = await loop.run_in_executor(None, bind(self._load_stt().transcribe, audio, samplerate))
+        print("Result: ", text)
+        return text
+
+    def interrupt(self):
+        """Cut off whatever is currently playing."""
+        if self.player:
+            self.player.flush()
 
     async def speak(self, text):
         print("Speaking: ", text)
         loop = asyncio.get_running_loop()
-        await loop.run_in_executor(None, self._speak_sync, text)
+        await loop.run_in_executor(None, bind(self._speak_sync, text))
 
     def _speak_sync(self, text):
         if not self.awake:
             return
         
         print("Speaking: ", text)
-        response = self.elevenlabs.text_to_speech.convert(
-            voice_id=self.voice_id,
-            output_format="mp3_22050_32",
-            text=text,
-            model_id="eleven_turbo_v2_5",
-        )
-
-        mp3_bytes = BytesIO()
-        mp3_bytes.name = "audio.mp3"
-        for chunk in response:
-            if chunk:
-                mp3_bytes.write(chunk)
-        mp3_bytes.seek(0)
-
-        data, samplerate = sf.read(mp3_bytes)
-        if self.output_sample_rate > 0:
-            print("Resampling from ", samplerate, " to ", self.output_sample_rate)
-            data = librosa.resample(data, orig_sr=samplerate, target_sr=self.output_sample_rate)
-        sd.play(data, self.output_sample_rate or samplerate)
-        sd.wait()
+        self._play_sync(self.voice().stream(text))
+
+    def _play_sync(self, chunks):
+        if self.player is None:
+            self.player = Player(self.tts.samplerate)
+
+        # don't let the mic pick up our own voice as the next utterance, when barge-in
+        # is enabled keep listening but only for speech louder than the speaker.
+        # there's no echo cancellation, so that's still only a rough guard
+        if self.listener:
+            if self.barge_in:
+                self.listener.duck()
+            else:
+                self.listener.mute()
+        try:
+            with tracer.span("play"):
+                self.player.play(self._mark_first_audio(chunks))
+        finally:
+            if self.listener:
+                self.listener.unduck()
+                self.listener.unmute()
+
+    @staticmethod
+    def _mark_first_audio(chunks):
+        recording = _recording.get()
+        for chunk in chunks:
+            if not isinstance(chunk, Cue):
+                tracer.mark("first_audio")
+                if recording is not None:
+                    recording.append(chunk)
+            yield chunk
+
+
+def http_client(timeout=HTTP_TIMEOUT, connect_timeout=HTTP_CONNECT_TIMEOUT, max_connections=20):
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(timeout, connect=connect_timeout),
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+def openai_client_for(http, timeout=HTTP_TIMEOUT):
+    import openai
+    return openai.AsyncOpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        http_client=http,
+        timeout=timeout,
+    )
+
+
+def robot_connection(ip):
+    # the webrtc driver pulls in aiortc and friends, only load it when there's a robot
+    from unitree_webrtc_connect.webrtc_driver import (
+        UnitreeWebRTCConnection,
+        WebRTCConnectionMethod,
+    )
+    return UnitreeWebRTCConnection(WebRTCConnectionMethod.LocalSTA, ip=ip)
 
 
 async def loop(dog):
-    await dog.connect_robot()
+    startup = await dog.start()
+    click.echo("Startup: " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in startup.items()))
     click.echo("Starting doggo, listening on audio input...")
-    while True:
-        text = await dog.listen()
-        if text:
-            print("Heard: ", text)
-            await dog.think(text)
-        await asyncio.sleep(0.1)
+    try:
+        await Pipeline(dog, barge_in=dog.barge_in).run()
+    finally:
+        dog.print_summary()
+        await dog.close()
 
 
 @click.command()
 @click.option("--voice", type=click.Choice(VOICES.keys()), default="burt")
 @click.option("--alive/--dead", is_flag=True, default=True)
+@click.option("--robot-ip", type=str, default=ROBOT_IP, help="address of the robot to drive")
+@click.option("--fleet", "fleet_config", type=click.Path(exists=True), default=None, help="JSON list of robots (name, ip and optional voice) to drive from one process, overrides --robot-ip")
 @click.option("--configure-input/--no-configure-input", is_flag=True, default=False)
 @click.option("--input-sample-rate", type=int, default=44100)
 @click.option("--output-sample-rate", type=int, default=0)
 @click.option("--input-device", type=str, default="USB PnP")
 @click.option("--output-device", type=str, default="UACDemo")
+@click.option("--list-devices", is_flag=True, default=False, help="print the available audio devices and exit")
 @click.option("--echo/--no-echo", is_flag=True, default=False)
-def main(voice, alive, configure_input, input_sample_rate, output_sample_rate, input_device, output_device, echo):
+@click.option("--vad-threshold", type=float, default=0.01, help="minimum RMS energy treated as speech")
+@click.option("--silence-duration", type=float, default=0.6, help="seconds of silence that end an utterance")
+@click.option("--stt", type=click.Choice(STT_BACKENDS), default="elevenlabs", help="speech-to-text backend")
+@click.option("--whisper-model", type=str, default="base.en", help="whisper model to load for --stt=whisper")
+@click.option("--tts-cache-mb", type=int, default=64, help="memory budget for cached speech clips, 0 disables")
+@click.option("--tts-cache-dir", type=str, default=None, help="persist cached speech clips to this directory")
+@click.option("--tts-cache-disk-mb", type=int, default=256, help="disk budget for --tts-cache-dir, least recently used clips are removed past it")
+@click.option("--stream-completions/--no-stream-completions", is_flag=True, default=True, help="speak each sentence as soon as the model produces it")
+@click.option("--http-timeout", type=float, default=HTTP_TIMEOUT, help="timeout in seconds for openai and plural requests")
+@click.option("--barge-in/--no-barge-in", is_flag=True, default=False, help="let new speech interrupt the current response, best with a headset or a speaker the mic can't hear")
+@click.option("--reconnect-policy", type=click.Choice(ConnectionSupervisor.POLICIES), default="buffer", help="hold or reject robot commands while reconnecting")
+@click.option("--trace-file", type=str, default=None, help="append per-stage latency spans to this file as JSON lines")
+@click.option("--low-bandwidth/--no-low-bandwidth", is_flag=True, default=False, help="send and receive MP3 instead of raw PCM")
+@click.option("--resample-quality", type=click.Choice(RESAMPLE_QUALITY.keys()), default="medium", help="resampler quality when --output-sample-rate needs conversion")
+@click.option("--wake-gate/--no-wake-gate", is_flag=True, default=True, help="while asleep, only call the model when a wake word is heard")
+@click.option("--wake-word", "wake_words", type=str, multiple=True, help="extra wake word spellings to accept")
+@click.option("--fast-intents/--no-fast-intents", is_flag=True, default=True, help="send simple trick commands straight to the robot without the model")
+@click.option("--intent-synonyms", type=click.Path(exists=True), default=None, help="JSON file mapping trick names to extra command phrases")
+@click.option("--memory-tokens", type=int, default=MEMORY_TOKENS, help="token budget for conversation history, 0 disables memory")
+@click.option("--response-cache-mb", type=int, default=32, help="memory budget for cached answers to repeated questions, 0 disables")
+@click.option("--response-cache-ttl", type=float, default=RESPONSE_TTL, help="seconds a cached answer stays valid")
+@click.option("--response-cache-similarity", type=float, default=0.0, help="also reuse answers to questions at least this similar (0-1, eg 0.9), 0 only matches exactly")
+@click.option("--plural-poll-interval", type=float, default=5.0, help="seconds between status checks of running plural agent sessions")
+def main(voice, alive, robot_ip, fleet_config, configure_input, input_sample_rate, output_sample_rate, input_device, output_device, list_devices, echo, vad_threshold, silence_duration, stt, whisper_model, tts_cache_mb, tts_cache_dir, tts_cache_disk_mb, stream_completions, http_timeout, barge_in, reconnect_policy, trace_file, low_bandwidth, resample_quality, wake_gate, wake_words, fast_intents, intent_synonyms, memory_tokens, response_cache_mb, response_cache_ttl, response_cache_similarity, plural_poll_interval):
+    if list_devices:
+        click.echo(sd.query_devices())
+        return
+
+    configure_tracing(trace_file)
     if configure_input:
         sd.default.device = (input_device, output_device)
     if input_sample_rate > 0:
         sd.default.samplerate = input_sample_rate
-    devices = sd.query_devices()
-    print("Number of devices: ", len(devices))
-    print("Devices: ", json.dumps(devices, indent=2))
-
-    dog = Doggo(voice, alive, output_sample_rate, echo)
+    synonyms = None
+    if intent_synonyms:
+        with open(intent_synonyms, "r") as f:
+            synonyms = json.load(f)
+
+    robots = load_fleet(fleet_config) if fleet_config else [{"name": "k9s", "ip": robot_ip}]
+
+    dog = Doggo(
+        voice,
+        alive,
+        output_sample_rate,
+        echo,
+        robots=robots,
+        vad_threshold=vad_threshold,
+        silence_duration=silence_duration,
+        stt=stt,
+        whisper_model=whisper_model,
+        tts_cache_mb=tts_cache_mb,
+        tts_cache_dir=tts_cache_dir,
+        tts_cache_disk_mb=tts_cache_disk_mb,
+        stream_completions=stream_completions,
+        http_timeout=http_timeout,
+        barge_in=barge_in,
+        reconnect_policy=reconnect_policy,
+        low_bandwidth=low_bandwidth,
+        resample_quality=resample_quality,
+        wake_gate=wake_gate,
+        wake_words=WAKE_WORDS + list(wake_words),
+        fast_intents=fast_intents,
+        intent_synonyms=synonyms,
+        memory_tokens=memory_tokens,
+        plural_poll_interval=plural_poll_interval,
+        response_cache_mb=response_cache_mb,
+        response_cache_ttl=response_cache_ttl,
+        response_cache_similarity=response_cache_similarity,
+    )
     asyncio.run(loop(dog))
 
 
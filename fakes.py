@@ -0,0 +1,237 @@
+"""
+Local stand-ins for the speech, completion, Plural and robot backends, with
+configurable injected latencies.  Used by ``bench.py`` to drive ``Doggo``
+without hardware or network access.
+"""
+import copy
+import json
+import time
+import asyncio
+import httpx
+import numpy as np
+
+from types import SimpleNamespace
+from audio import Cue
+
+
+class FakeSTT:
+    """Returns the scripted transcript queued for each utterance."""
+
+    def __init__(self, latency=0.3):
+        self.latency = latency
+        self.transcripts = []
+
+    def expect(self, text):
+        self.transcripts.append(text)
+
+    def transcribe(self, audio, samplerate):
+        time.sleep(self.latency)
+        return self.transcripts.pop(0) if self.transcripts else ""
+
+
+class FakeTTS:
+    """Yields silent float32 chunks, roughly 70ms of audio per character."""
+
+    def __init__(self, first_chunk_latency=0.25, chunk_latency=0.02, samplerate=22050, chunk_duration=0.1):
+        self.voice_id = "fake"
+        self.model_id = "fake"
+        self.output_format = f"pcm_{samplerate}"
+        self.samplerate = samplerate
+        self.first_chunk_latency = first_chunk_latency
+        self.chunk_latency = chunk_latency
+        self.chunk_duration = chunk_duration
+
+    def with_voice(self, voice_id):
+        tts = copy.copy(self)
+        tts.voice_id = voice_id
+        return tts
+
+    def stream(self, text):
+        total = max(1, int(len(text) * 0.07 / self.chunk_duration))
+        time.sleep(self.first_chunk_latency)
+        for i in range(total):
+            if i:
+                time.sleep(self.chunk_latency)
+            yield np.zeros(int(self.samplerate * self.chunk_duration), dtype=np.float32)
+
+
+class FakePlayer:
+    """Sleeps for the duration of each clip, ``speed`` times faster than real time."""
+
+    def __init__(self, samplerate, speed=1.0):
+        self.samplerate = samplerate
+        self.speed = speed
+        self.samples = 0
+
+    def start(self):
+        pass
+
+    def close(self):
+        pass
+
+    def play(self, chunks):
+        for chunk in chunks:
+            if isinstance(chunk, Cue):
+                chunk.fire()
+                continue
+            self.samples += len(chunk)
+            time.sleep(len(chunk) / self.samplerate / self.speed)
+
+    def flush(self):
+        pass
+
+
+class FakeCompletions:
+    """
+    Scripted chat completions.  ``responder`` maps the request messages to a
+    ``(content, tool_calls)`` pair, where tool_calls is a list of
+    ``(name, arguments)`` tuples.
+    """
+
+    def __init__(self, responder, first_token_latency=0.4, token_latency=0.01):
+        self.responder = responder
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.calls = 0
+
+    async def create(self, model=None, messages=None, tools=None, stream=False, **kwargs):
+        self.calls += 1
+        content, tool_calls = self.responder(messages)
+        tool_calls = [
+            SimpleNamespace(
+                index=i,
+                id=f"call_{self.calls}_{i}",
+                function=SimpleNamespace(name=name, arguments=arguments),
+            )
+            for i, (name, arguments) in enumerate(tool_calls or [])
+        ]
+
+        if stream:
+            return self._stream(content, tool_calls)
+
+        tokens = len(content.split()) if content else 0
+        await asyncio.sleep(self.first_token_latency + tokens * self.token_latency)
+        message = SimpleNamespace(content=content, tool_calls=tool_calls or None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    async def _stream(self, content, tool_calls):
+        await asyncio.sleep(self.first_token_latency)
+        for token in (content or "").split(" "):
+            if token:
+                await asyncio.sleep(self.token_latency)
+                yield _chunk(content=token + " ")
+        for call in tool_calls:
+            yield _chunk(tool_calls=[call])
+
+
+def _chunk(content=None, tool_calls=None):
+    delta = SimpleNamespace(content=content, tool_calls=tool_calls)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+class FakeOpenAI:
+    def __init__(self, responder, **latencies):
+        self.chat = SimpleNamespace(completions=FakeCompletions(responder, **latencies))
+
+
+def fake_plural_client(latency=0.5, session_duration=2.0):
+    """
+    An httpx client whose transport answers CreateAgentSession locally, and
+    the tracker's batched AgentSessions query with sessions that are done
+    ``session_duration`` seconds after creation.  ``requests`` counts calls
+    by operation name.
+    """
+    sessions = iter(range(1, 1_000_000))
+    created = {}
+    requests = {}
+
+    async def handler(request):
+        await asyncio.sleep(latency)
+        if not request.content:
+            return httpx.Response(200)
+        body = json.loads(request.content)
+        operation = body.get("operationName")
+        requests[operation] = requests.get(operation, 0) + 1
+        if operation == "CreateAgentSession":
+            session_id = f"fake-{next(sessions)}"
+            created[session_id] = time.monotonic()
+            return httpx.Response(200, json={"data": {"createAgentSession": {"id": session_id}}})
+        if operation == "AgentSessions":
+            data, errors = {}, []
+            for alias, session_id in body["variables"].items():
+                if session_id not in created:
+                    data[alias] = None
+                    errors.append({"message": "could not find resource", "path": [alias]})
+                    continue
+                done = time.monotonic() - created[session_id] >= session_duration
+                data[alias] = {"id": session_id, "done": done}
+            return httpx.Response(200, json={"data": data, "errors": errors or None})
+        return httpx.Response(200, json={"data": {}})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    client.requests = requests
+    return client
+
+
+# sport mode each command leaves the fake robot in, see telemetry.POSTURES
+FAKE_MODES = {1001: 7, 1003: 1, 1004: 1, 1008: 3}
+
+
+class FakePubSub:
+    def __init__(self, robot):
+        self.robot = robot
+        self.subscribers = {}
+
+    def subscribe(self, topic, callback):
+        self.subscribers.setdefault(topic, []).append(callback)
+        self.robot.report()
+
+    def emit(self, topic, data):
+        for callback in self.subscribers.get(topic, []):
+            callback({"type": "msg", "topic": topic, "data": data})
+
+    async def publish_request_new(self, topic, options):
+        await asyncio.sleep(self.robot.latency)
+        self.robot.published.append((topic, options))
+        self.robot.mode = FAKE_MODES.get(options["api_id"], self.robot.mode)
+        self.robot.report()
+        return {"data": {"header": {"status": {"code": 0}}}}
+
+
+class FakeRobot:
+    """Mimics the parts of ``UnitreeWebRTCConnection`` used by Doggo."""
+
+    def __init__(self, latency=0.03, connect_latency=1.0, report_interval=0.1):
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.report_interval = report_interval
+        self.isConnected = False
+        self.published = []
+        self.mode = 7
+        self.battery = 90
+        self.reporter = None
+        self.datachannel = SimpleNamespace(pub_sub=FakePubSub(self))
+
+    def report(self):
+        """Push a telemetry sample to subscribers, as the robot does continuously."""
+        pub_sub = self.datachannel.pub_sub
+        velocity = [0.3, 0.0, 0.0] if self.mode == 3 else [0.0, 0.0, 0.0]
+        pub_sub.emit("rt/lf/sportmodestate", {"mode": self.mode, "velocity": velocity, "yaw_speed": 0.0, "body_height": 0.32})
+        pub_sub.emit("rt/lf/lowstate", {"bms_state": {"soc": self.battery}})
+
+    async def _report(self):
+        while self.isConnected:
+            self.report()
+            await asyncio.sleep(self.report_interval)
+
+    async def connect(self):
+        await asyncio.sleep(self.connect_latency)
+        self.isConnected = True
+        if self.reporter is None or self.reporter.done():
+            self.reporter = asyncio.create_task(self._report())
+
+    async def reconnect(self):
+        await self.connect()
+
+    async def disconnect(self):
+        self.isConnected = False
@@ -0,0 +1,153 @@
+import json
+import asyncio
+import contextvars
+
+from contextlib import contextmanager
+from unitree_webrtc_connect.constants import RTC_TOPIC
+from robot import CommandScheduler, ConnectionSupervisor
+from intents import WakeGate
+from telemetry import Telemetry
+
+BROADCAST = "all"
+
+# the robot named by the tool call being run, see Fleet.target
+_target = contextvars.ContextVar("target", default=None)
+
+
+class Unit:
+    """One robot in the fleet, its connection, command scheduler, telemetry and voice."""
+
+    def __init__(self, name, robot, tts, reconnect_policy="buffer"):
+        self.name = name
+        self.robot = robot
+        self.tts = tts
+        self.telemetry = Telemetry()
+        self.connection = ConnectionSupervisor(
+            robot,
+            policy=reconnect_policy,
+            on_connect=lambda: self.telemetry.subscribe(robot),
+        )
+        self.commands = CommandScheduler(self.publish)
+        self.gate = WakeGate([name])
+        # commands decided on but not carried out yet, including ones waiting on a speech cue
+        self.holds = 0
+
+    def hold(self):
+        self.holds += 1
+
+    def release(self):
+        self.holds = max(0, self.holds - 1)
+
+    def busy(self):
+        """Whether telemetry may not reflect what this robot has been told to do yet."""
+        return self.holds > 0
+
+    async def publish(self, args):
+        await self.connection.ensure()
+        return await self.robot.datachannel.pub_sub.publish_request_new(
+            RTC_TOPIC["SPORT_MOD"], args
+        )
+
+    async def start(self):
+        await self.connection.start()
+
+    async def close(self):
+        await self.commands.close()
+        await self.connection.stop()
+
+
+class Fleet:
+    """
+    The robots driven by one Doggo.  Model clients, speech, caches and audio
+    all stay shared, a unit only adds its own WebRTC connection, command
+    scheduler, telemetry and voice.
+
+    Robot commands go to the robot the tool call names, else to the one
+    addressed by name in the current turn, else to every robot.
+    """
+
+    def __init__(self, units):
+        self.units = {unit.name: unit for unit in units}
+        self.addressed = None
+
+    def __len__(self):
+        return len(self.units)
+
+    def __iter__(self):
+        return iter(self.units.values())
+
+    def names(self):
+        return list(self.units)
+
+    def address(self, text):
+        """Note which robot a transcript is talking to, if it names exactly one."""
+        if len(self.units) == 1:
+            self.addressed = next(iter(self))
+            return self.addressed
+        named = [unit for unit in self if unit.gate.matches(text)]
+        self.addressed = named[0] if len(named) == 1 else None
+        return self.addressed
+
+    @contextmanager
+    def target(self, name):
+        token = _target.set(name)
+        try:
+            yield
+        finally:
+            _target.reset(token)
+
+    def route(self):
+        name = _target.get()
+        if name == BROADCAST:
+            return list(self)
+        if name:
+            if name not in self.units:
+                raise ValueError(f"no robot named {name}, expected one of {self.names()}")
+            return [self.units[name]]
+        if self.addressed:
+            return [self.addressed]
+        return list(self)
+
+    def summary(self):
+        """What each robot is doing right now, for the model."""
+        if len(self.units) == 1:
+            return next(iter(self)).telemetry.summary()
+        return "; ".join(f"{unit.name} is {unit.telemetry.summary()}" for unit in self)
+
+    def voice(self, default):
+        """The TTS to answer with, the addressed robot's voice if there is one."""
+        if self.addressed:
+            return self.addressed.tts
+        return default
+
+    def robot_property(self):
+        """Schema for the extra ``robot`` argument trick tools take in a fleet."""
+        return {
+            "type": "string",
+            "enum": self.names() + [BROADCAST],
+            "description": f"which robot to command, or '{BROADCAST}' for every robot. Defaults to whoever was addressed",
+        }
+
+    async def start(self):
+        await asyncio.gather(*[unit.start() for unit in self])
+
+    async def close(self):
+        for unit in self:
+            await unit.close()
+
+
+def load_fleet(path):
+    """Read robot configs, a JSON list of ``{"name", "ip", "voice"}`` objects."""
+    with open(path, "r") as f:
+        robots = json.load(f)
+
+    if not isinstance(robots, list) or not robots:
+        raise ValueError(f"{path}: expected a non-empty list of robots")
+    names = set()
+    for robot in robots:
+        if not robot.get("name") or not robot.get("ip"):
+            raise ValueError(f"{path}: every robot needs a name and an ip")
+        if robot["name"] in names or robot["name"] == BROADCAST:
+            raise ValueError(f"{path}: robot name {robot['name']} is reserved or used twice")
+        names.add(robot["name"])
+    return robots
@@ -0,0 +1,125 @@
+import re
+import difflib
+
+# what "k9s" tends to come back as from speech-to-text
+WAKE_WORDS = [
+    "k9s",
+    "k9",
+    "k nines",
+    "k nine",
+    "kay nines",
+    "kay nine",
+    "canines",
+    "canine",
+    "kanines",
+    "k9 s",
+    "k nine s",
+    "k 9 s",
+    "k 9s",
+]
+
+
+def normalize(text):
+    text = text.lower().replace("-", " ")
+    text = re.sub(r"[^a-z0-9\s]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def similar(a, b, threshold):
+    return a == b or difflib.SequenceMatcher(None, a, b).ratio() >= threshold
+
+
+class WakeGate:
+    """
+    Cheap local check for whether a transcript addresses the dog, used to
+    skip the model entirely while asleep.  A window of the transcript matches
+    a wake word when it has as many words and each one fuzzy matches its
+    counterpart, so a stray "nine" or "okay line" doesn't wake the dog.
+    Single word wake words need the closer ``single_threshold`` match.
+    """
+
+    def __init__(self, words=None, threshold=0.8, single_threshold=0.9):
+        self.words = [normalize(w).split() for w in (words or WAKE_WORDS)]
+        self.threshold = threshold
+        self.single_threshold = single_threshold
+
+    def matches(self, text):
+        tokens = normalize(text).split()
+        for word in self.words:
+            size = len(word)
+            threshold = self.single_threshold if size == 1 else self.threshold
+            for i in range(len(tokens) - size + 1):
+                if all(similar(token, part, threshold) for token, part in zip(tokens[i:i + size], word)):
+                    return True
+        return False
+
+
+# extra ways people phrase the tricks, keyed by tool name
+INTENT_SYNONYMS = {
+    "stand_up": ["get up", "stand"],
+    "lie_down": ["lay down", "down", "lie"],
+    "hello": ["say hi", "wave", "wave hello"],
+    "stop": ["halt", "freeze", "stay", "stop moving", "stop it", "stop that"],
+    "dance": ["boogie", "do a dance", "bust a move"],
+    "jump": ["hop", "do a jump"],
+    "stretch": ["do a stretch", "have a stretch"],
+}
+
+FILLER = {"please", "hey", "hi", "ok", "okay", "now", "go", "doggo", "dog", "buddy", "the", "can", "could", "you", "and", "a", "little"}
+
+DESCRIPTION_PREFIX = "make the dog "
+
+
+class IntentMatcher:
+    """
+    Maps short, unambiguous commands ("k9s, stand up please") straight to a
+    parameterless trick tool, so they don't wait on a completion.  Anything
+    longer, ambiguous or conversational returns None and goes to the model.
+    """
+
+    def __init__(self, tools, synonyms=None, wake_words=None, threshold=0.88, max_words=4):
+        self.threshold = threshold
+        self.max_words = max_words
+        self.ignore = set(FILLER)
+        for word in wake_words or WAKE_WORDS:
+            self.ignore.update(normalize(word).split())
+
+        self.phrases = {}
+        for tool in tools:
+            if tool.spec and tool.spec.get("required"):
+                continue
+            phrases = set(INTENT_SYNONYMS.get(tool.name, []))
+            phrases.update((synonyms or {}).get(tool.name, []))
+            description = normalize(tool.description)
+            if description.startswith(DESCRIPTION_PREFIX):
+                phrases.add(description[len(DESCRIPTION_PREFIX):])
+            for phrase in phrases:
+                self.phrases[self.strip(phrase)] = tool
+
+    def strip(self, text):
+        return " ".join(t for t in normalize(text).split() if t not in self.ignore)
+
+    def match(self, text):
+        command = self.strip(text)
+        if not command or len(command.split()) > self.max_words:
+            return None
+
+        tool = self.phrases.get(command)
+        if tool:
+            return tool
+
+        scored = sorted(
+            ((difflib.SequenceMatcher(None, command, phrase).ratio(), tool) for phrase, tool in self.phrases.items()),
+            key=lambda pair: pair[0],
+            reverse=True,
+        )
+        best, tool = scored[0] if scored else (0, None)
+        if best < self.threshold:
+            return None
+        # a different trick scoring nearly as well means we can't be sure
+        for score, other in scored[1:]:
+            if best - score > 0.05:
+                break
+            if other is not tool:
+                return None
+        return tool
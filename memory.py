@@ -0,0 +1,76 @@
+import json
+import time
+
+MAX_TOKENS = 4000
+IDLE_TIMEOUT = 600
+SUMMARY_CHARS = 600
+
+
+def estimate_tokens(message):
+    """Rough token count, about four characters per token of serialized message."""
+    return len(json.dumps(message, default=str)) // 4 + 4
+
+
+class Conversation:
+    """
+    Per-session message history kept under a token budget.
+
+    History is stored as whole turns so tool calls never get separated from
+    their results.  When the budget is exceeded the oldest turns are dropped
+    down to ``low_water`` of it in one go, with their user requests folded
+    into a short summary, so the message prefix stays identical across many
+    requests and provider-side prompt caching keeps hitting.  A session that
+    has been idle for ``idle_timeout`` seconds starts over.
+    """
+
+    def __init__(self, max_tokens=MAX_TOKENS, idle_timeout=IDLE_TIMEOUT, low_water=0.6):
+        self.max_tokens = max_tokens
+        self.idle_timeout = idle_timeout
+        self.low_water = low_water
+        self.reset()
+
+    def reset(self):
+        self.turns = []
+        self.tokens = 0
+        self.summary = []
+        self.last_active = time.monotonic()
+
+    def messages(self, system_prompt, text):
+        """The prompt for a new user message: system, summary, history, then the message."""
+        if time.monotonic() - self.last_active > self.idle_timeout:
+            print("Conversation idle, starting a new session")
+            self.reset()
+
+        messages = [{"role": "system", "content": system_prompt}]
+        if self.summary:
+            messages.append({
+                "role": "system",
+                "content": "Earlier in this conversation the user said: " + " / ".join(self.summary),
+            })
+        for turn, _ in self.turns:
+            messages.extend(turn)
+        messages.append({"role": "user", "content": text})
+        return messages
+
+    def record(self, turn):
+        """Store a finished turn, the user message and everything after it."""
+        if not turn:
+            return
+        tokens = sum(estimate_tokens(m) for m in turn)
+        self.turns.append((turn, tokens))
+        self.tokens += tokens
+        self.last_active = time.monotonic()
+        if self.tokens > self.max_tokens:
+            self._trim()
+
+    def _trim(self):
+        target = self.max_tokens * self.low_water
+        while self.turns and self.tokens > target:
+            turn, tokens = self.turns.pop(0)
+            self.tokens -= tokens
+            if turn[0].get("role") == "user" and turn[0].get("content"):
+                self.summary.append(turn[0]["content"][:120])
+
+        # keep only the most recent requests that fit in the summary
+        while len(" / ".join(self.summary)) > SUMMARY_CHARS and len(self.summary) > 1:
+            self.summary.pop(0)
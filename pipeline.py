@@ -0,0 +1,118 @@
+import asyncio
+
+from tracing import tracer
+
+SUMMARY_EVERY = 10
+
+
+def put_latest(queue, item):
+    """Put a ``(turn, ...)`` item onto a bounded queue, dropping the oldest turn if it's full."""
+    if queue.full():
+        turn = queue.get_nowait()[0]
+        tracer.drop_turn(turn)
+    queue.put_nowait(item)
+
+
+class Pipeline:
+    """
+    Runs capture -> transcribe -> reason as concurrent stages joined by bounded
+    queues, so the dog keeps listening while it thinks and talks.  Synthesis
+    and playback are pipelined inside ``Doggo.think`` by ``SpeechStream``.
+
+    With ``barge_in`` a newly transcribed utterance cancels the turn in
+    flight, cutting off any speech and pending completion.  Noise that
+    transcribes to nothing never interrupts.  Background notices, like
+    a finished plural session, are announced once the current turn is over.
+    """
+
+    def __init__(self, dog, barge_in=False, queue_size=2):
+        self.dog = dog
+        self.barge_in = barge_in
+        self.utterances = asyncio.Queue(maxsize=queue_size)
+        self.transcripts = asyncio.Queue(maxsize=queue_size)
+        self.turn = None
+        self.turns = 0
+
+    async def run(self):
+        stages = [
+            asyncio.create_task(self.capture()),
+            asyncio.create_task(self.transcribe()),
+            asyncio.create_task(self.reason()),
+            asyncio.create_task(self.announce()),
+        ]
+        try:
+            await asyncio.gather(*stages)
+        finally:
+            for stage in stages:
+                stage.cancel()
+            self.interrupt()
+
+    async def capture(self):
+        while True:
+            audio = await self.dog.capture()
+            if audio is None:
+                await asyncio.sleep(0.1)
+                continue
+            # turns are timed from the end of the utterance
+            turn = tracer.new_turn()
+            put_latest(self.utterances, (turn, audio))
+
+    async def transcribe(self):
+        while True:
+            turn, audio = await self.utterances.get()
+            tracer.use_turn(turn)
+            try:
+                text = await self.dog.transcribe(audio)
+            except Exception as e:
+                print("Transcription failed: ", e)
+                text = None
+            if text:
+                put_latest(self.transcripts, (turn, text))
+            else:
+                tracer.drop_turn(turn)
+
+    async def reason(self):
+        while True:
+            turn, text = await self.transcripts.get()
+            # check again after every wait, announce may have started a turn of its own meanwhile
+            while self.turn and not self.turn.done():
+                if self.barge_in:
+                    self.interrupt()
+                await asyncio.wait([self.turn])
+            print("Heard: ", text)
+            self.turn = asyncio.create_task(self._think(turn, text))
+
+    async def announce(self):
+        while True:
+            notice = await self.dog.notices.get()
+            while self.turn and not self.turn.done():
+                await asyncio.wait([self.turn])
+            self.turn = asyncio.create_task(self._announce(notice))
+
+    async def _announce(self, notice):
+        try:
+            await self.dog.announce(notice)
+        except Exception as e:
+            print("Announcement failed: ", e)
+
+    async def _think(self, turn, text):
+        tracer.use_turn(turn)
+        try:
+            with tracer.span("think"):
+                await self.dog.think(text)
+        except asyncio.CancelledError:
+            tracer.drop_turn(turn)
+            raise
+        except Exception as e:
+            print("Turn failed: ", e)
+        tracer.end_turn(turn)
+
+        self.turns += 1
+        if self.turns % SUMMARY_EVERY == 0:
+            self.dog.print_summary()
+
+    def interrupt(self):
+        if self.turn and not self.turn.done():
+            print("Interrupted")
+            self.turn.cancel()
+        self.dog.interrupt()
@@ -1,5 +1,7 @@
 import os
 import json
+import time
+import asyncio
 import httpx
 
 PLURAL_CONSOLE_URL = os.getenv("PLURAL_CONSOLE_URL", "https://console.plrldemo.onplural.sh")
@@ -13,19 +15,151 @@ CREATE_AGENT_SESSION_MUTATION = """mutation CreateAgentSession($attributes: Agen
 }
 """
 
+# fields fetched for every tracked session, ``done`` flips once the agent has finished
+SESSION_FIELDS = "id done"
+
+
+def headers():
+    return {
+        "accept": "*/*",
+        "authorization": f"Token {PAT}",
+        "content-type": "application/json",
+    }
+
+
+async def post(client, headers, payload):
+    if client:
+        return await client.post(PLURAL_GQL_ENDPOINT, headers=headers, json=payload)
+
+    async with httpx.AsyncClient() as client:
+        return await client.post(
+            PLURAL_GQL_ENDPOINT,
+            headers=headers,
+            json=payload,
+            timeout=30.0
+        )
+
+
+class AgentSession:
+    def __init__(self, id, prompt):
+        self.id = id
+        self.prompt = prompt
+        self.created = time.monotonic()
+        self.status = "running"
+        self.error = None
+
+    def summary(self):
+        if self.status == "done":
+            return f"The Plural agent finished working on: '{self.prompt}'"
+        return f"The Plural agent failed on: '{self.prompt}' ({self.error})"
+
+
+class SessionTracker:
+    """
+    Follows agent sessions created by AskPlural until they finish.
+
+    All outstanding sessions are fetched in one aliased GraphQL query per
+    ``poll_interval`` (in batches of ``batch_size``), so the request rate
+    doesn't grow with the number of sessions.  The last known status of each
+    session is cached in ``sessions``, and ``on_update`` is called with the
+    AgentSession once it's done, fails or passes ``timeout`` seconds.
+    """
+
+    def __init__(self, client=None, poll_interval=5.0, timeout=1800, batch_size=50, on_update=None):
+        self.client = client
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.on_update = on_update
+        self.sessions = {}
+        self.outstanding = {}
+        self.task = None
+
+    def track(self, session_id, prompt):
+        session = AgentSession(session_id, prompt)
+        self.sessions[session_id] = session
+        self.outstanding[session_id] = session
+        if not self.task or self.task.done():
+            self.task = asyncio.create_task(self._run())
+        return session
+
+    def status(self, session_id):
+        session = self.sessions.get(session_id)
+        return session.status if session else None
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def _run(self):
+        while self.outstanding:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.poll()
+            except (httpx.HTTPError, ValueError) as e:
+                print("Polling Plural agent sessions failed: ", e)
+
+            for session in list(self.outstanding.values()):
+                if time.monotonic() - session.created > self.timeout:
+                    self._finish(session, "failed", "timed out waiting for the agent")
+
+    async def poll(self):
+        ids = list(self.outstanding)
+        for i in range(0, len(ids), self.batch_size):
+            await self._poll_batch(ids[i:i + self.batch_size])
+
+    async def _poll_batch(self, ids):
+        aliases = {f"s{i}": session_id for i, session_id in enumerate(ids)}
+        variables = ", ".join(f"${alias}: ID!" for alias in aliases)
+        fields = "\n".join(
+            f"  {alias}: agentSession(id: ${alias}) {{ {SESSION_FIELDS} }}" for alias in aliases
+        )
+        payload = {
+            "operationName": "AgentSessions",
+            "variables": aliases,
+            "query": f"query AgentSessions({variables}) {{\n{fields}\n}}",
+        }
+        response = await self.post(headers(), payload)
+        response.raise_for_status()
+        result = response.json()
+
+        # errors are reported per alias, eg a session that no longer exists
+        for error in result.get("errors") or []:
+            path = error.get("path") or []
+            session = self.outstanding.get(aliases.get(path[0])) if path else None
+            if session:
+                self._finish(session, "failed", error.get("message", "unknown error"))
+
+        for alias, data in (result.get("data") or {}).items():
+            session = self.outstanding.get(aliases.get(alias))
+            if session and data and data.get("done"):
+                self._finish(session, "done")
+
+    def _finish(self, session, status, error=None):
+        session.status = status
+        session.error = error
+        self.outstanding.pop(session.id, None)
+        print("Plural agent session ", session.id, " ", status)
+        if self.on_update:
+            self.on_update(session)
+
+    async def post(self, headers, payload):
+        return await post(self.client, headers, payload)
+
 
 class AskPlural:
     """Tool for sending prompts to the Plural AI agent to manage infrastructure."""
     
-    def __init__(self):
+    def __init__(self, client=None, tracker=None):
+        self.client = client
+        self.tracker = tracker
         self.name = "ask_plural"
         self.description = "Ask Plural AI to make infrastructure changes, like scaling databases, modifying deployments, or managing Kubernetes resources. Use this when the user wants to make changes to their cloud infrastructure."
         self.file = "tools/plural.json"
     
     async def act(self, params):
-        if isinstance(params, str):
-            params = json.loads(params)
-        
         prompt = params.get("prompt", "")
         if not prompt:
             return "Error: No prompt provided for Plural agent"
@@ -33,12 +167,6 @@ class AskPlural:
         if not PAT:
             return "Error: PLURAL_PAT environment variable is not set. Please set your Plural Personal Access Token."
         
-        headers = {
-            "accept": "*/*",
-            "authorization": f"Token {PAT}",
-            "content-type": "application/json",
-        }
-        
         payload = {
             "operationName": "CreateAgentSession",
             "variables": {
@@ -51,28 +179,25 @@ class AskPlural:
         }
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    PLURAL_GQL_ENDPOINT,
-                    headers=headers,
-                    json=payload,
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                result = response.json()
-                
-                if "errors" in result:
-                    error_messages = [e.get("message", "Unknown error") for e in result["errors"]]
-                    return f"Plural API returned errors: {', '.join(error_messages)}"
-                
-                data = result.get("data", {})
-                session = data.get("createAgentSession", {})
-                
-                if session:
-                    session_id = session.get("id", "unknown")
-                    return f"Successfully created Plural agent session (ID: {session_id}). The agent is now processing your request: '{prompt}'"
-                else:
-                    return f"Request sent to Plural successfully, but no session data returned. Response: {json.dumps(result)}"
+            response = await self.post(headers(), payload)
+            response.raise_for_status()
+            result = response.json()
+            
+            if "errors" in result:
+                error_messages = [e.get("message", "Unknown error") for e in result["errors"]]
+                return f"Plural API returned errors: {', '.join(error_messages)}"
+            
+            data = result.get("data", {})
+            session = data.get("createAgentSession", {})
+            
+            if session:
+                session_id = session.get("id", "unknown")
+                if self.tracker and "id" in session:
+                    self.tracker.track(session_id, prompt)
+                    return f"Successfully created Plural agent session (ID: {session_id}). The agent is now processing your request: '{prompt}'. You'll be told when it finishes."
+                return f"Successfully created Plural agent session (ID: {session_id}). The agent is now processing your request: '{prompt}'"
+            else:
+                return f"Request sent to Plural successfully, but no session data returned. Response: {json.dumps(result)}"
                     
         except httpx.HTTPStatusError as e:
             return f"Error calling Plural API: HTTP {e.response.status_code} - {e.response.text}"
@@ -81,6 +206,9 @@ class AskPlural:
         except Exception as e:
             return f"Unexpected error calling Plural API: {str(e)}"
     
+    async def post(self, headers, payload):
+        return await post(self.client, headers, payload)
+
     def tool(self, Tool):
         return Tool(
             name=self.name,
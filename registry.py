@@ -0,0 +1,225 @@
+import json
+import inspect
+import functools
+
+JSON_TYPES = {"object", "array", "string", "number", "integer", "boolean", "null"}
+
+
+@functools.lru_cache(maxsize=None)
+def load_spec(filepath):
+    """Load and validate a tool's JSON schema, once per file."""
+    with open(filepath, "r") as f:
+        spec = json.load(f)
+
+    if spec.get("type") != "object":
+        raise ValueError(f"{filepath}: tool parameters must be an object schema")
+    properties = spec.get("properties", {})
+    if not isinstance(properties, dict):
+        raise ValueError(f"{filepath}: properties must be a mapping")
+    for name, prop in properties.items():
+        if prop.get("type") not in JSON_TYPES:
+            raise ValueError(f"{filepath}: property {name} has unknown type {prop.get('type')!r}")
+        if prop.get("minimum", 0) > prop.get("maximum", float("inf")):
+            raise ValueError(f"{filepath}: property {name} has minimum above maximum")
+    missing = set(spec.get("required", [])) - set(properties)
+    if missing:
+        raise ValueError(f"{filepath}: required properties {sorted(missing)} are not defined")
+    return spec
+
+
+class ToolArgumentError(ValueError):
+    def __init__(self, tool, problems):
+        super().__init__(f"invalid arguments for {tool}: " + "; ".join(problems))
+        self.tool = tool
+        self.problems = problems
+
+    def result(self):
+        """The tool result handed back to the model, so it can fix the call itself."""
+        return json.dumps({"error": "invalid_arguments", "tool": self.tool, "problems": self.problems})
+
+
+def _number(value, integer=False):
+    if isinstance(value, bool):
+        raise ValueError
+    if isinstance(value, str):
+        value = float(value.strip())
+    if not isinstance(value, (int, float)) or value != value:
+        raise ValueError
+    if integer:
+        if value != int(value):
+            raise ValueError
+        return int(value)
+    return float(value)
+
+
+def _boolean(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+        return value.strip().lower() == "true"
+    raise ValueError
+
+
+def _string(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise ValueError
+
+
+def _compile_property(name, prop):
+    kind = prop.get("type")
+    if kind in ("number", "integer"):
+        lower, upper = prop.get("minimum"), prop.get("maximum")
+        integer = kind == "integer"
+
+        def check(value):
+            value = _number(value, integer)
+            # out of range values are clamped rather than rejected, the model
+            # asking for "fast" shouldn't cost a retry
+            if lower is not None:
+                value = max(lower, value)
+            if upper is not None:
+                value = min(upper, value)
+            return value
+        return check
+
+    if kind == "string":
+        choices = prop.get("enum")
+
+        def check(value):
+            value = _string(value)
+            if choices and value not in choices:
+                raise ValueError
+            return value
+        return check
+
+    if kind == "boolean":
+        return _boolean
+
+    expected = {"object": dict, "array": list, "null": type(None)}[kind]
+
+    def check(value):
+        if not isinstance(value, expected):
+            raise ValueError
+        return value
+    return check
+
+
+class Validator:
+    """
+    Checks tool call arguments against a tool's schema, compiled once from
+    the spec.  Arguments are parsed from the model's JSON string, coerced to
+    the declared types, clamped to any minimum/maximum and stripped of
+    properties the schema doesn't declare.
+    """
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.required = list(spec.get("required", []))
+        self.properties = {
+            prop: (_compile_property(prop, schema), schema.get("type"))
+            for prop, schema in spec.get("properties", {}).items()
+        }
+
+    def __call__(self, arguments):
+        if arguments is None or (isinstance(arguments, str) and not arguments.strip()):
+            arguments = {}
+        elif isinstance(arguments, str):
+            try:
+                arguments = json.loads(arguments)
+            except json.JSONDecodeError as e:
+                raise ToolArgumentError(self.name, [f"arguments are not valid JSON: {e.msg}"])
+        if not isinstance(arguments, dict):
+            raise ToolArgumentError(self.name, ["arguments must be a JSON object"])
+
+        params, problems = {}, []
+        for prop in self.required:
+            if arguments.get(prop) is None:
+                problems.append(f"{prop} is required")
+        for prop, value in arguments.items():
+            if prop not in self.properties or value is None:
+                continue
+            check, kind = self.properties[prop]
+            try:
+                params[prop] = check(value)
+            except (ValueError, TypeError):
+                problems.append(f"{prop} must be a valid {kind}, got {value!r}")
+        if problems:
+            raise ToolArgumentError(self.name, problems)
+        return params
+
+
+class Tool:
+    # tools sharing a lane run one at a time in call order, the rest run concurrently
+    def __init__(self, name, description, filepath, callback, awake=True, lane=None, spec=None):
+        self.name = name
+        self.description = description
+        self.filepath = filepath
+        self.callback = callback
+        self.awake = awake
+        self.lane = lane
+        self.spec = spec or load_spec(self.filepath)
+        self.validate = Validator(name, self.spec)
+
+    def payload(self):
+        return {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": self.description,
+                "parameters": self.spec,
+            },
+        }
+
+    async def run(self, arguments):
+        """Validate the raw arguments and call the tool, raises ToolArgumentError if they're bad."""
+        result = self.callback(self.validate(arguments))
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+
+class ToolSet:
+    """The tools offered in one awake/asleep state, with their request payload prebuilt."""
+
+    def __init__(self, tools):
+        self.tools = tools
+        self.by_name = {tool.name: tool for tool in tools}
+        self.payload = [tool.payload() for tool in tools]
+
+
+class ToolRegistry:
+    """
+    Holds every registered tool and caches a ToolSet per state, so the hot
+    path never re-filters tools or rebuilds the OpenAI ``tools`` list.  The
+    cache is only invalidated when tools are registered.
+    """
+
+    def __init__(self, tools=None):
+        self.tools = []
+        self.sets = {}
+        for tool in tools or []:
+            self.register(tool)
+
+    def register(self, tool):
+        if any(existing.name == tool.name and existing.awake == tool.awake for existing in self.tools):
+            raise ValueError(f"tool {tool.name} is already registered")
+        self.tools.append(tool)
+        self.sets.clear()
+        return tool
+
+    def extend(self, tools):
+        for tool in tools:
+            self.register(tool)
+
+    def for_state(self, awake):
+        toolset = self.sets.get(awake)
+        if toolset is None:
+            toolset = ToolSet([tool for tool in self.tools if tool.awake == awake])
+            self.sets[awake] = toolset
+        return toolset
+
+    def __iter__(self):
+        return iter(self.tools)
@@ -0,0 +1,245 @@
+import time
+import random
+import asyncio
+
+from collections import deque
+from tracing import tracer
+
+PUBLISH_INTERVAL = 0.05
+MAX_PENDING = 32
+LATENCY_HISTORY = 100
+
+
+class Command:
+    def __init__(self, api_id, params=None, coalesce=False):
+        self.api_id = api_id
+        self.params = params
+        self.coalesce = coalesce
+        self.submitted = time.monotonic()
+        self.turn = tracer.current_turn()
+        self.future = asyncio.get_running_loop().create_future()
+
+    def args(self):
+        args = {"api_id": self.api_id}
+        if self.params:
+            args["parameter"] = self.params
+        return args
+
+    def resolve(self, result=None, error=None):
+        if self.future.done():
+            return
+        if error:
+            self.future.set_exception(error)
+        else:
+            self.future.set_result(result)
+
+
+class CommandSuperseded(Exception):
+    pass
+
+
+class CommandScheduler:
+    """
+    Serializes SPORT_MOD publishes for one robot.
+
+    Commands are sent in submission order, at most one per ``interval``
+    seconds.  A coalescing command (eg Move) replaces an identical command
+    still waiting at the back of the queue, since only the latest velocity
+    matters, and an urgent command (eg Stop) drops everything pending and
+    goes next.  ``submit`` returns a future resolved once the robot
+    acknowledges the publish.
+    """
+
+    def __init__(self, publish, interval=PUBLISH_INTERVAL, max_pending=MAX_PENDING):
+        self.publish = publish
+        self.interval = interval
+        self.max_pending = max_pending
+        self.pending = deque()
+        self.ready = asyncio.Event()
+        self.worker = None
+        self.latencies = deque(maxlen=LATENCY_HISTORY)
+
+    def submit(self, api_id, params=None, coalesce=False, urgent=False):
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.create_task(self._run())
+
+        command = Command(api_id, params, coalesce)
+        if urgent:
+            while self.pending:
+                self.pending.popleft().resolve(error=CommandSuperseded(f"superseded by {api_id}"))
+        elif coalesce and self.pending and self.pending[-1].api_id == api_id:
+            self.pending.pop().resolve(error=CommandSuperseded(f"superseded by a newer {api_id}"))
+        elif len(self.pending) >= self.max_pending:
+            command.resolve(error=RuntimeError("robot command queue is full"))
+            return command.future
+
+        self.pending.append(command)
+        self.ready.set()
+        return command.future
+
+    async def _run(self):
+        last = 0.0
+        while True:
+            if not self.pending:
+                self.ready.clear()
+                await self.ready.wait()
+                continue
+
+            wait = last + self.interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+
+            command = self.pending.popleft()
+            sent = time.monotonic()
+            try:
+                result = await self.publish(command.args())
+            except Exception as e:
+                print("Robot command ", command.api_id, " failed: ", e)
+                command.resolve(error=e)
+            else:
+                command.resolve(result)
+            last = time.monotonic()
+            self.latencies.append((command.api_id, sent - command.submitted, last - sent))
+            tracer.record("robot.queued", sent - command.submitted, command.turn, api_id=command.api_id)
+            tracer.record("robot.publish", last - sent, command.turn, api_id=command.api_id)
+            print(f"Robot command {command.api_id}: queued {sent - command.submitted:.3f}s, sent {last - sent:.3f}s")
+
+    def stats(self):
+        if not self.latencies:
+            return {"commands": 0, "pending": len(self.pending)}
+        queued = sorted(q for _, q, _ in self.latencies)
+        sent = sorted(s for _, _, s in self.latencies)
+        return {
+            "commands": len(self.latencies),
+            "pending": len(self.pending),
+            "queued_p50": queued[len(queued) // 2],
+            "sent_p50": sent[len(sent) // 2],
+            "sent_max": sent[-1],
+        }
+
+    async def close(self):
+        if self.worker:
+            self.worker.cancel()
+        while self.pending:
+            self.pending.popleft().resolve(error=asyncio.CancelledError())
+
+
+class RobotUnavailable(Exception):
+    pass
+
+
+class ConnectionSupervisor:
+    """
+    Keeps a ``UnitreeWebRTCConnection`` healthy in the background.
+
+    A monitor task polls ``isConnected`` and reconnects with jittered
+    exponential backoff, always under a single lock so concurrent callers
+    never trigger overlapping reconnects.  Publishers call ``ensure`` which
+    returns immediately while healthy; during a reconnect it either waits up
+    to ``buffer_timeout`` (policy ``buffer``) or raises ``RobotUnavailable``
+    (policy ``reject``).  ``on_connect`` is called after every successful
+    connect, eg to set up subscriptions again.
+    """
+
+    POLICIES = ["buffer", "reject"]
+
+    def __init__(
+        self,
+        robot,
+        policy="buffer",
+        check_interval=1.0,
+        backoff_base=0.5,
+        backoff_max=30.0,
+        buffer_timeout=10.0,
+        on_connect=None,
+    ):
+        self.robot = robot
+        self.policy = policy
+        self.check_interval = check_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.buffer_timeout = buffer_timeout
+        self.on_connect = on_connect
+        self.lock = asyncio.Lock()
+        self.healthy = asyncio.Event()
+        self.monitor = None
+        self.reconnecting = None
+        self.reconnects = 0
+
+    async def start(self):
+        try:
+            async with self.lock:
+                await self.robot.connect()
+                self._connected()
+                self.healthy.set()
+        finally:
+            # monitor even if the first connect failed, a robot that's unreachable at boot gets retried too
+            if self.monitor is None:
+                self.monitor = asyncio.create_task(self._monitor())
+
+    async def stop(self):
+        if self.monitor:
+            self.monitor.cancel()
+            self.monitor = None
+        if self.reconnecting:
+            self.reconnecting.cancel()
+
+    def connected(self):
+        return bool(self.robot.isConnected)
+
+    async def ensure(self):
+        if self.healthy.is_set() and self.connected():
+            return
+        if not self.lock.locked() and self.reconnecting is None:
+            # the drop happened since the last health check, don't wait for the monitor
+            self.healthy.clear()
+            self.reconnecting = asyncio.create_task(self.reconnect())
+            self.reconnecting.add_done_callback(self._reconnected)
+        if self.policy == "reject":
+            raise RobotUnavailable("robot is reconnecting")
+        try:
+            await asyncio.wait_for(self.healthy.wait(), self.buffer_timeout)
+        except asyncio.TimeoutError:
+            raise RobotUnavailable(f"robot did not reconnect within {self.buffer_timeout}s")
+
+    async def _monitor(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            if not self.connected():
+                await self.reconnect()
+
+    async def reconnect(self):
+        async with self.lock:
+            if self.connected():
+                self.healthy.set()
+                return
+            self.healthy.clear()
+            attempt = 0
+            while True:
+                try:
+                    print("Reconnecting to robot, attempt ", attempt + 1)
+                    await self.robot.reconnect()
+                    if self.connected():
+                        break
+                except Exception as e:
+                    print("Robot reconnect failed: ", e)
+                delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+                await asyncio.sleep(random.uniform(delay / 2, delay))
+                attempt += 1
+            self.reconnects += 1
+            self._connected()
+            self.healthy.set()
+
+    def _reconnected(self, task):
+        self.reconnecting = None
+        if not task.cancelled() and task.exception():
+            print("Robot reconnect failed: ", task.exception())
+
+    def _connected(self):
+        if not self.on_connect:
+            return
+        try:
+            self.on_connect()
+        except Exception as e:
+            print("Robot connect hook failed: ", e)
@@ -0,0 +1,99 @@
+import soundfile as sf
+import numpy as np
+
+from io import BytesIO
+from audio import resample
+
+WHISPER_SAMPLE_RATE = 16000
+PCM_SAMPLE_RATE = 16000
+
+
+def to_pcm16(audio):
+    """Convert float32 samples to raw signed 16 bit little endian bytes."""
+    pcm = np.clip(audio, -1.0, 1.0) * 32767
+    return pcm.astype("<i2").tobytes()
+
+
+class SpeechToText:
+    """Base interface for transcription backends, takes mono float32 audio."""
+
+    def transcribe(self, audio, samplerate):
+        raise NotImplementedError
+
+
+class ElevenLabsSTT(SpeechToText):
+    """
+    Uploads audio as raw 16 kHz PCM, which skips encoding entirely.  With
+    ``compressed`` it falls back to a low bitrate MP3 for constrained uplinks.
+    """
+
+    def __init__(self, client, model_id="scribe_v1", language_code="en", compressed=False):
+        self.client = client
+        self.model_id = model_id
+        self.language_code = language_code
+        self.compressed = compressed
+
+    def transcribe(self, audio, samplerate):
+        if self.compressed:
+            return self._transcribe_mp3(audio, samplerate)
+
+        audio = resample(audio, samplerate, PCM_SAMPLE_RATE)
+        result = self.client.speech_to_text.convert(
+            file=("audio.pcm", to_pcm16(audio), "application/octet-stream"),
+            file_format="pcm_s16le_16",
+            model_id=self.model_id,
+            language_code=self.language_code,
+        )
+        return result.text
+
+    def _transcribe_mp3(self, audio, samplerate):
+        bytes_io = BytesIO()
+        bytes_io.name = "audio.mp3"
+        sf.write(
+            bytes_io,
+            audio,
+            samplerate,
+            bitrate_mode="CONSTANT",
+            compression_level=0.99,
+        )
+        bytes_io.seek(0)
+        result = self.client.speech_to_text.convert(
+            file=bytes_io,
+            model_id=self.model_id,
+            language_code=self.language_code,
+        )
+        return result.text
+
+
+class WhisperSTT(SpeechToText):
+    """Local whisper transcription, the model is loaded once and kept warm."""
+
+    def __init__(self, model="base.en", language="en", device=None):
+        # whisper pulls in torch, which takes seconds to import
+        import whisper
+
+        self.language = language
+        print("Loading whisper model ", model)
+        self.model = whisper.load_model(model, device=device)
+        self.fp16 = self.model.device.type == "cuda"
+
+    def transcribe(self, audio, samplerate):
+        audio = resample(audio, samplerate, WHISPER_SAMPLE_RATE)
+        result = self.model.transcribe(
+            audio,
+            language=self.language,
+            fp16=self.fp16,
+            condition_on_previous_text=False,
+        )
+        return result["text"].strip()
+
+
+BACKENDS = ["elevenlabs", "whisper"]
+
+
+def stt_backend(name, elevenlabs_client=None, whisper_model="base.en", compressed=False):
+    if name == "elevenlabs":
+        return ElevenLabsSTT(elevenlabs_client, compressed=compressed)
+    if name == "whisper":
+        return WhisperSTT(whisper_model)
+    raise ValueError(f"unknown speech-to-text backend: {name}")
@@ -0,0 +1,125 @@
+import time
+import math
+
+from collections import deque
+from unitree_webrtc_connect.constants import RTC_TOPIC
+
+HISTORY = 200
+STALE_AFTER = 1.0
+MOVING_SPEED = 0.05
+
+# sport mode state's ``mode`` field, as a posture the model and tricks can use
+POSTURES = {
+    0: "standing",
+    1: "standing",
+    2: "posing",
+    3: "walking",
+    5: "lying down",
+    6: "standing",
+    7: "lying down",
+    8: "getting up",
+    10: "sitting",
+    11: "jumping",
+    12: "jumping",
+    13: "jumping",
+}
+
+
+class RobotState:
+    """One immutable telemetry sample, readers can hold on to it safely."""
+
+    __slots__ = ("received", "mode", "posture", "speed", "yaw_speed", "body_height", "battery")
+
+    def __init__(self, received, mode=None, posture=None, speed=0.0, yaw_speed=0.0, body_height=None, battery=None):
+        self.received = received
+        self.mode = mode
+        self.posture = posture
+        self.speed = speed
+        self.yaw_speed = yaw_speed
+        self.body_height = body_height
+        self.battery = battery
+
+    @property
+    def moving(self):
+        return self.speed > MOVING_SPEED or abs(self.yaw_speed) > MOVING_SPEED
+
+    def summary(self):
+        parts = []
+        if self.posture:
+            parts.append(f"{self.posture}, moving at {self.speed:.1f} m/s" if self.moving else self.posture)
+        if self.battery is not None:
+            parts.append(f"battery {self.battery}%")
+        return ", ".join(parts) or "unknown"
+
+
+class Telemetry:
+    """
+    Latest-state cache for one robot, fed by its sport mode and low level
+    state topics.  Every message builds a new RobotState which replaces
+    ``state`` with a single assignment, so readers on any thread just take
+    the attribute and never lock.  The last ``history`` sport samples are
+    kept in ``samples``.
+    """
+
+    def __init__(self, history=HISTORY, stale_after=STALE_AFTER):
+        self.stale_after = stale_after
+        self.state = None
+        self.samples = deque(maxlen=history)
+
+    def subscribe(self, robot):
+        """Subscribe on a (re)connected robot, the driver forgets subscriptions with the channel."""
+        pub_sub = robot.datachannel.pub_sub
+        pub_sub.subscribe(RTC_TOPIC["LF_SPORT_MOD_STATE"], self.on_sport_state)
+        pub_sub.subscribe(RTC_TOPIC["LOW_STATE"], self.on_low_state)
+
+    def on_sport_state(self, message):
+        data = message.get("data") or {}
+        mode = data.get("mode")
+        velocity = data.get("velocity") or [0.0, 0.0, 0.0]
+        previous = self.state
+        state = RobotState(
+            time.monotonic(),
+            mode=mode,
+            posture=POSTURES.get(mode),
+            speed=math.hypot(velocity[0], velocity[1]),
+            yaw_speed=data.get("yaw_speed", 0.0),
+            body_height=data.get("body_height"),
+            battery=previous.battery if previous else None,
+        )
+        self.state = state
+        self.samples.append(state)
+
+    def on_low_state(self, message):
+        soc = ((message.get("data") or {}).get("bms_state") or {}).get("soc")
+        previous = self.state
+        if soc is None or (previous and previous.battery == soc):
+            return
+        if previous:
+            state = RobotState(
+                previous.received,
+                previous.mode,
+                previous.posture,
+                previous.speed,
+                previous.yaw_speed,
+                previous.body_height,
+                soc,
+            )
+        else:
+            state = RobotState(time.monotonic(), battery=soc)
+        self.state = state
+
+    def latest(self):
+        """The current state, or None if telemetry has gone quiet."""
+        state = self.state
+        if state is None or time.monotonic() - state.received > self.stale_after:
+            return None
+        return state
+
+    def is_in(self, postures):
+        """Whether the robot is known to be still in one of ``postures``."""
+        state = self.latest()
+        return bool(state and state.posture in postures and not state.moving)
+
+    def summary(self):
+        state = self.latest()
+        return state.summary() if state else "unknown, no telemetry"
@@ -0,0 +1,48 @@
+import os
+import sys
+
+import pytest
+
+# the bot's modules live at the repository root rather than in a package
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def replying(content, tools=None):
+    """A scripted model that answers every question the same way, then stops after tools."""
+    def respond(messages):
+        if messages[-1]["role"] == "tool":
+            return None, []
+        return content, tools or []
+    return respond
+
+
+@pytest.fixture
+def make_dog(monkeypatch):
+    """Build a Doggo on the fake backends, driving ``robot``."""
+    import plural
+    from doggo import Doggo
+    from fakes import FakeSTT, FakeTTS, FakePlayer, FakeOpenAI, fake_plural_client
+
+    monkeypatch.chdir(ROOT)
+    monkeypatch.setattr(plural, "PAT", plural.PAT or "test")
+
+    def make(responder, robot, **options):
+        tts = FakeTTS(first_chunk_latency=0.01)
+        options = {
+            "tts_cache_mb": 0,
+            "response_cache_mb": 0,
+            "fast_intents": False,
+            **options,
+        }
+        return Doggo(
+            alive=True,
+            stt=FakeSTT(latency=0),
+            tts=tts,
+            http=fake_plural_client(latency=0),
+            openai_client=FakeOpenAI(responder, first_token_latency=0.01, token_latency=0),
+            robot_factory=lambda ip: robot,
+            player=FakePlayer(tts.samplerate, speed=20),
+            **options,
+        )
+    return make
@@ -0,0 +1,100 @@
+import time
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from cache import PhraseCache, ResponseCache
+from conftest import replying
+from fakes import FakeRobot
+
+
+@pytest.mark.parametrize("text", [
+    "are you standing",
+    "what is your battery level",
+    "how many agent sessions are running",
+    "what did I just ask",
+    "explain that again",
+    "what posture is the dog in",
+    "is the robot moving",
+])
+def test_live_and_contextual_questions_are_not_cached(text):
+    assert ResponseCache().key(text) is None
+
+
+def test_questions_normalize_to_the_same_key():
+    cache = ResponseCache(ignore=["k9s"])
+    assert cache.key("k9s, what's a pod?") == cache.key("what is a pod")
+
+
+def test_answers_expire(monkeypatch):
+    cache = ResponseCache(ttl=60)
+    cache.put("scope", "what is a pod", "A small group of containers.")
+    assert cache.get("scope", "what is a pod").reply == "A small group of containers."
+    assert cache.get("other scope", "what is a pod") is None
+
+    now = time.monotonic()
+    monkeypatch.setattr("cache.time.monotonic", lambda: now + 61)
+    assert cache.get("scope", "what is a pod") is None
+
+
+def test_state_dependent_answer_is_not_replayed_after_the_robot_moves(make_dog):
+    async def main():
+        robot = FakeRobot(latency=0, connect_latency=0)
+        robot.mode = 7  # lying down
+        dog = make_dog(replying("The dog is lying down."), robot, response_cache_mb=8)
+        completions = dog.openai.chat.completions
+        await dog.start()
+        try:
+            await dog.think("what posture is the dog in")
+            await dog.think("what posture is the dog in")
+            repeated = completions.calls
+
+            robot.mode = 1  # standing
+            robot.report()
+            await dog.think("what posture is the dog in")
+            return repeated, completions.calls
+        finally:
+            await dog.close()
+
+    repeated, after_moving = asyncio.run(main())
+    assert repeated == 2
+    assert after_moving == 3
+
+
+def test_phrase_cache_persists_the_same_phrase_from_many_threads(tmp_path):
+    cache = PhraseCache(directory=str(tmp_path))
+    clip = np.ones(4000, dtype=np.float32)
+    threads = [threading.Thread(target=cache.put, args=("hello", clip)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    files = list(tmp_path.iterdir())
+    assert [f.suffix for f in files] == [".npy"]
+    assert cache.disk_size == files[0].stat().st_size
+    assert np.array_equal(PhraseCache(directory=str(tmp_path)).get("hello"), clip)
+
+
+def test_repeated_question_is_answered_from_the_cache_mid_session(make_dog):
+    async def main():
+        robot = FakeRobot(latency=0, connect_latency=0)
+        dog = make_dog(replying("A pod is a group of containers."), robot, response_cache_mb=8)
+        completions = dog.openai.chat.completions
+        await dog.start()
+        try:
+            await dog.think("what is a pod")
+            await dog.think("what is a deployment")
+            robot.battery -= 1
+            robot.report()
+            await dog.think("what is a pod")
+            await dog.think("k9s, what's a pod?")
+            return completions.calls, dog.responses.stats()["hits"]
+        finally:
+            await dog.close()
+
+    calls, hits = asyncio.run(main())
+    assert calls == 2
+    assert hits == 2
@@ -0,0 +1,34 @@
+import pytest
+
+from intents import WakeGate
+
+
+@pytest.mark.parametrize("text", [
+    "k9s, wake up",
+    "hey K-9s are you there",
+    "k nine s wake up",
+    "k 9 s",
+    "kay nines, time to get up",
+    "canine wake up",
+    "kanine wake up",
+])
+def test_wake_gate_matches_wake_words(text):
+    assert WakeGate().matches(text)
+
+
+@pytest.mark.parametrize("text", [
+    "I have nine pods",
+    "okay line them up",
+    "nine",
+    "what's the weather like",
+    "cane sugar",
+    "k",
+])
+def test_wake_gate_ignores_near_misses(text):
+    assert not WakeGate().matches(text)
+
+
+def test_wake_gate_single_names_need_a_close_match():
+    gate = WakeGate(["rex"])
+    assert gate.matches("rex, sit")
+    assert not gate.matches("rax, sit")
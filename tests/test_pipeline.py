@@ -0,0 +1,51 @@
+import asyncio
+
+from pipeline import Pipeline
+
+
+class SlowDog:
+    """Takes a while over every turn and announcement, noting how many overlap."""
+
+    def __init__(self):
+        self.notices = asyncio.Queue()
+        self.active = 0
+        self.most_active = 0
+        self.handled = []
+
+    async def _busy(self, what):
+        self.active += 1
+        self.most_active = max(self.most_active, self.active)
+        try:
+            await asyncio.sleep(0.05)
+            self.handled.append(what)
+        finally:
+            self.active -= 1
+
+    async def think(self, text):
+        await self._busy(text)
+
+    async def announce(self, notice):
+        await self._busy(notice)
+
+    def interrupt(self):
+        pass
+
+
+def test_announcement_and_turn_queued_behind_a_turn_run_one_at_a_time():
+    async def main():
+        dog = SlowDog()
+        pipeline = Pipeline(dog)
+        pipeline.turn = asyncio.create_task(dog.think("first"))
+        stages = [asyncio.create_task(pipeline.announce()), asyncio.create_task(pipeline.reason())]
+        await asyncio.sleep(0)
+        dog.notices.put_nowait("session finished")
+        pipeline.transcripts.put_nowait((None, "second"))
+
+        await asyncio.sleep(0.5)
+        for stage in stages:
+            stage.cancel()
+        return dog
+
+    dog = asyncio.run(main())
+    assert dog.most_active == 1
+    assert sorted(dog.handled) == ["first", "second", "session finished"]
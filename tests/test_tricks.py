@@ -0,0 +1,43 @@
+import asyncio
+
+from conftest import replying
+from fakes import FakeRobot
+from unitree_webrtc_connect.constants import SPORT_CMD
+
+
+def sent(robot):
+    return [options["api_id"] for _, options in robot.published]
+
+
+def test_opposite_tricks_in_one_turn_both_run(make_dog):
+    async def main():
+        robot = FakeRobot(latency=0, connect_latency=0)
+        robot.mode = 7  # lying down
+        dog = make_dog(replying("Up, then back down.", [["stand_up", "{}"], ["lie_down", "{}"]]), robot)
+        await dog.start()
+        try:
+            await dog.think("stand up and then lie back down")
+            await asyncio.sleep(0.3)
+        finally:
+            await dog.close()
+        return robot
+
+    robot = asyncio.run(main())
+    assert sent(robot) == [SPORT_CMD["StandUp"], SPORT_CMD["Damp"]]
+    assert robot.mode == 7
+
+
+def test_trick_already_done_is_skipped(make_dog):
+    async def main():
+        robot = FakeRobot(latency=0, connect_latency=0)
+        robot.mode = 7
+        dog = make_dog(replying("Lying down.", [["lie_down", "{}"]]), robot)
+        await dog.start()
+        try:
+            await dog.think("lie down")
+            await asyncio.sleep(0.3)
+        finally:
+            await dog.close()
+        return robot
+
+    assert sent(asyncio.run(main())) == []
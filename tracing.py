@@ -0,0 +1,131 @@
+import json
+import math
+import time
+import functools
+import itertools
+import threading
+import contextvars
+
+from collections import deque, defaultdict
+from contextlib import contextmanager
+
+WINDOW = 500
+
+_turn = contextvars.ContextVar("turn", default=None)
+
+
+class Tracer:
+    """
+    Records per-stage timings tagged with the conversational turn they
+    belong to.  Each span is optionally appended to ``path`` as a JSON line,
+    and the last ``window`` durations per stage back a p50/p95/p99 summary.
+    """
+
+    def __init__(self, path=None, window=WINDOW):
+        self.path = path
+        self.window = window
+        self.durations = defaultdict(lambda: deque(maxlen=self.window))
+        self.turns = {}
+        self.marked = {}
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.file = open(path, "a", buffering=1) if path else None
+
+    def new_turn(self):
+        """Start a turn and make it current for this context (and tasks spawned from it)."""
+        turn = next(self.ids)
+        with self.lock:
+            self.turns[turn] = time.monotonic()
+        _turn.set(turn)
+        return turn
+
+    def end_turn(self, turn):
+        with self.lock:
+            start = self.turns.pop(turn, None)
+            self.marked.pop(turn, None)
+        if start is not None:
+            self.record("turn", time.monotonic() - start, turn)
+
+    def current_turn(self):
+        return _turn.get()
+
+    def drop_turn(self, turn):
+        with self.lock:
+            self.turns.pop(turn, None)
+            self.marked.pop(turn, None)
+
+    def use_turn(self, turn):
+        _turn.set(turn)
+
+    @contextmanager
+    def span(self, name, turn=None, **attrs):
+        turn = turn or _turn.get()
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(name, time.monotonic() - start, turn, **attrs)
+
+    def mark(self, name, turn=None):
+        """Record the time since the turn started, once per turn."""
+        turn = turn or _turn.get()
+        with self.lock:
+            start = self.turns.get(turn)
+            if start is None:
+                return
+            marked = self.marked.setdefault(turn, set())
+            if name in marked:
+                return
+            marked.add(name)
+        self.record(name, time.monotonic() - start, turn)
+
+    def record(self, name, duration, turn=None, **attrs):
+        with self.lock:
+            self.durations[name].append(duration)
+        if self.file:
+            event = {"ts": time.time(), "turn": turn, "stage": name, "duration": round(duration, 6)}
+            event.update(attrs)
+            with self.lock:
+                self.file.write(json.dumps(event, default=str) + "\n")
+
+    def summary(self):
+        with self.lock:
+            stages = {name: sorted(values) for name, values in self.durations.items()}
+        return {
+            name: {
+                "count": len(values),
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "p99": percentile(values, 99),
+            }
+            for name, values in stages.items()
+            if values
+        }
+
+    def print_summary(self):
+        for name, stats in sorted(self.summary().items()):
+            print(f"{name:<24} n={stats['count']:<5} p50={stats['p50']:.3f}s p95={stats['p95']:.3f}s p99={stats['p99']:.3f}s")
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, math.ceil(pct / 100 * len(values)) - 1))
+    return values[rank]
+
+
+def bind(fn, *args):
+    """Wrap a call so it sees the current turn when run in an executor thread."""
+    return functools.partial(contextvars.copy_context().run, fn, *args)
+
+
+tracer = Tracer()
+
+
+def configure(path=None):
+    if tracer.file:
+        tracer.file.close()
+    tracer.path = path
+    tracer.file = open(path, "a", buffering=1) if path else None
+    return tracer
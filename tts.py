@@ -0,0 +1,310 @@
+import copy
+import time
+import queue
+import asyncio
+import threading
+import numpy as np
+import soundfile as sf
+
+from io import BytesIO
+from tracing import tracer, bind
+from audio import Resampler, Cue
+
+PCM_SAMPLE_RATES = [16000, 22050, 24000, 32000, 44100, 48000]
+DEFAULT_SAMPLE_RATE = 22050
+COMPRESSED_FORMAT = "mp3_22050_32"
+
+
+class PcmDecoder:
+    """Incrementally decodes signed 16 bit little endian PCM into float32."""
+
+    def __init__(self):
+        self.remainder = b""
+
+    def decode(self, chunk):
+        data = self.remainder + chunk if self.remainder else chunk
+        usable = len(data) - len(data) % 2
+        self.remainder = data[usable:]
+        samples = np.frombuffer(data, dtype="<i2", count=usable // 2).astype(np.float32)
+        samples *= 1 / 32768.0
+        return samples
+
+
+class ElevenLabsTTS:
+    """
+    Streams synthesized speech as float32 chunks at ``samplerate``.
+
+    Raw PCM is requested at the output rate when ElevenLabs supports it, so
+    chunks can be played as they arrive without decoding or resampling.
+    ``compressed`` requests MP3 instead, for when bandwidth matters more.
+    """
+
+    def __init__(self, client, voice_id, model_id="eleven_turbo_v2_5", output_sample_rate=0, output_format=None, compressed=False, resample_quality="medium"):
+        self.client = client
+        self.voice_id = voice_id
+        self.model_id = model_id
+        self.output_sample_rate = output_sample_rate
+
+        if output_format is None and compressed:
+            output_format = COMPRESSED_FORMAT
+        if output_format is None:
+            rate = output_sample_rate if output_sample_rate in PCM_SAMPLE_RATES else DEFAULT_SAMPLE_RATE
+            output_format = f"pcm_{rate}"
+        self.output_format = output_format
+        self.source_rate = int(output_format.split("_")[1])
+        self.samplerate = output_sample_rate or self.source_rate
+        self.resample_quality = resample_quality
+        # idle resamplers, reset between clips so their filters are designed once, not per sentence
+        self.resamplers = []
+        self.resamplers_lock = threading.Lock()
+
+    def with_voice(self, voice_id):
+        """The same synthesizer speaking with another voice, sharing the client."""
+        tts = copy.copy(self)
+        tts.voice_id = voice_id
+        return tts
+
+    def stream(self, text):
+        response = self.client.text_to_speech.stream(
+            voice_id=self.voice_id,
+            output_format=self.output_format,
+            text=text,
+            model_id=self.model_id,
+        )
+
+        if self.output_format.startswith("pcm"):
+            chunks = self._decode_pcm(response)
+        else:
+            chunks = self._decode_compressed(response)
+
+        if self.source_rate == self.samplerate:
+            yield from chunks
+            return
+
+        resampler = self._take_resampler()
+        try:
+            for data in chunks:
+                with tracer.span("resample"):
+                    data = resampler.process(data)
+                yield data
+            yield resampler.flush()
+        finally:
+            self._return_resampler(resampler)
+
+    def _take_resampler(self):
+        # sentences are synthesized concurrently, each clip needs a stream of its own
+        with self.resamplers_lock:
+            if self.resamplers:
+                return self.resamplers.pop()
+        return Resampler(self.source_rate, self.samplerate, self.resample_quality)
+
+    def _return_resampler(self, resampler):
+        resampler.reset()
+        with self.resamplers_lock:
+            self.resamplers.append(resampler)
+
+    def _decode_pcm(self, response):
+        decoder = PcmDecoder()
+        for chunk in response:
+            if chunk:
+                yield decoder.decode(chunk)
+
+    def _decode_compressed(self, response):
+        buf = BytesIO()
+        buf.name = "audio.mp3"
+        for chunk in response:
+            if chunk:
+                buf.write(chunk)
+        buf.seek(0)
+        data, _ = sf.read(buf, dtype="float32")
+        yield data
+
+
+class CachedTTS:
+    """
+    Serves repeated phrases from a PhraseCache, streaming and filling it on a
+    miss.  Only short sentences are cached, the stock phrases that actually
+    repeat, rather than every long answer the dog ever gives.
+    """
+
+    def __init__(self, tts, cache, max_chars=120):
+        self.tts = tts
+        self.cache = cache
+        self.max_chars = max_chars
+
+    @property
+    def samplerate(self):
+        return self.tts.samplerate
+
+    @property
+    def voice_id(self):
+        return self.tts.voice_id
+
+    def with_voice(self, voice_id):
+        return CachedTTS(self.tts.with_voice(voice_id), self.cache, self.max_chars)
+
+    def key(self, text):
+        return (
+            self.tts.voice_id,
+            self.tts.model_id,
+            self.tts.output_format,
+            self.tts.samplerate,
+            text,
+        )
+
+    def stream(self, text):
+        if len(text) > self.max_chars:
+            yield from self.tts.stream(text)
+            return
+
+        key = self.key(text)
+        data = self.cache.get(key)
+        if data is not None:
+            yield data
+            return
+
+        chunks = []
+        for chunk in self.tts.stream(text):
+            chunks.append(chunk)
+            yield chunk
+        if chunks:
+            self.cache.put(key, np.concatenate(chunks))
+
+
+class SentenceSplitter:
+    """Accumulates streamed text deltas and yields complete sentences."""
+
+    ENDINGS = ".!?;:\n"
+    ABBREVIATIONS = ("e.g.", "i.e.", "etc.", "vs.", "mr.", "mrs.", "dr.")
+
+    def __init__(self, min_chars=12):
+        self.min_chars = min_chars
+        self.buffer = ""
+
+    def feed(self, delta):
+        self.buffer += delta
+        start = 0
+        for i, ch in enumerate(self.buffer):
+            if ch not in self.ENDINGS:
+                continue
+            # require whitespace after the punctuation so "1.5" or "k8s.io" don't split
+            if ch != "\n" and (i + 1 >= len(self.buffer) or not self.buffer[i + 1].isspace()):
+                continue
+            if i + 1 - start < self.min_chars:
+                continue
+            if self.buffer[start:i + 1].lower().endswith(self.ABBREVIATIONS):
+                continue
+            sentence = self.buffer[start:i + 1].strip()
+            start = i + 1
+            if sentence:
+                yield sentence
+        self.buffer = self.buffer[start:]
+
+    def flush(self):
+        sentence, self.buffer = self.buffer.strip(), ""
+        if sentence:
+            yield sentence
+
+
+_END = object()
+
+
+class SpeechStream:
+    """
+    Ordered playback of sentences whose synthesis runs ahead concurrently.
+
+    ``say`` starts synthesizing a sentence immediately (at most ``prefetch``
+    at a time) while a single worker plays sentences back in the order they
+    were queued, streaming each one as its chunks arrive.  Each sentence
+    starts with a Cue, so other work can be lined up with it.
+    """
+
+    def __init__(self, tts, play, prefetch=2):
+        self.tts = tts
+        self.play = play
+        self.slots = threading.Semaphore(prefetch)
+        self.pending = asyncio.Queue()
+        self.worker = None
+        self.cancelled = False
+        self.cues = []
+
+    def say(self, text):
+        """Queue a sentence, returning the Cue fired as it starts playing."""
+        loop = asyncio.get_running_loop()
+        if self.worker is None:
+            self.worker = asyncio.create_task(self._playback())
+
+        chunks = queue.Queue()
+        loop.run_in_executor(None, bind(self._synthesize, text, chunks))
+        cue = Cue()
+        self.cues.append(cue)
+        self.pending.put_nowait((cue, chunks))
+        return cue
+
+    def _synthesize(self, text, chunks):
+        with self.slots, tracer.span("tts.synthesize", chars=len(text)):
+            start = time.monotonic()
+            try:
+                for chunk in self.tts.stream(text):
+                    if self.cancelled:
+                        break
+                    if start:
+                        tracer.record("tts.first_chunk", time.monotonic() - start, tracer.current_turn())
+                        start = None
+                    chunks.put(chunk)
+            except Exception as e:
+                chunks.put(e)
+            chunks.put(_END)
+
+    @staticmethod
+    def _drain(chunks):
+        while True:
+            item = chunks.get()
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                print("Speech synthesis failed: ", item)
+                return
+            yield item
+
+    @staticmethod
+    def _cued(cue, chunks):
+        # the cue goes just ahead of the first audio, not when synthesis starts
+        for chunk in chunks:
+            if cue:
+                yield cue
+                cue = None
+            yield chunk
+        if cue:
+            cue.fire()
+
+    async def _playback(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self.pending.get()
+            if item is None:
+                return
+            cue, chunks = item
+            await loop.run_in_executor(None, bind(self.play, self._cued(cue, self._drain(chunks))))
+            # played without reaching it means it was flushed
+            cue.cancel()
+
+    async def close(self):
+        """Wait for everything queued so far to finish playing."""
+        if self.worker is None:
+            return
+        self.pending.put_nowait(None)
+        await self.worker
+        self.worker = None
+
+    def cancel(self):
+        """Stop synthesizing and drop anything not yet played."""
+        self.cancelled = True
+        while not self.pending.empty():
+            self.pending.get_nowait()
+        # anything lined up with speech that hasn't started yet won't happen now
+        for cue in self.cues:
+            cue.cancel()
+        if self.worker:
+            self.worker.cancel()
+            self.worker = None